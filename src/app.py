@@ -1,17 +1,21 @@
-from flask import Flask, render_template, session, request, g, jsonify, redirect, url_for
+from flask import Flask, render_template, session, request, g, jsonify, redirect, url_for, Response
 from src.auth import bp as auth_bp
-from src.auth import login_required
+from src.auth import login_required, role_required
 import random, json
 from datetime import datetime
-from src.db import init_db
+from src.db import init_db, init_app
 from werkzeug.utils import secure_filename
 from src.database_manager import DatabaseManager
+from src.events import order_events
 import os
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key'
 app.config['DATABASE'] = 'database.db'
 app.config['UPLOAD_FOLDER'] = 'static/images'
+app.config['USER_CACHE_TTL'] = 5
+app.config['BCRYPT_LOG_ROUNDS'] = 12
+app.config['TABLE_COUNT'] = 20
 
 db_manager = DatabaseManager()
 template_mapping = {
@@ -20,6 +24,17 @@ template_mapping = {
     3: 'kitchen_staff.html',
     4: 'manager.html'
 }
+order_statuses = [
+    'Order confirmed!',
+    'The order is in the kitchen!',
+    'The order is ready and will be with you shortly!',
+    'The order has been delivered!',
+    'The order has been Paid!'
+]
+ORDERS_PAGE_SIZE = 50
+ORDERS_MAX_PAGE_SIZE = 200
+
+init_app(app)
 
 with app.app_context():
     init_db()
@@ -33,17 +48,14 @@ app.register_blueprint(auth_bp)
 def index():
     """
     Checks to see if a user is logged in by checking if 'user_id' is in the session.
-    If a user is logged in, it retrieves their role_id from the database and 
-    determines the template to render based on the role_id. Otherwise, 
-    renders the default home template.
+    If a user is logged in, it uses the role_id loaded for the request to
+    determine the template to render. Otherwise, renders the default home template.
     
         Returns:
             str: The rendered index template.
     """
     if 'user_id' in session:
-        user_id = session['user_id']
-        role_id = db_manager.get_role_id(user_id)
-        template = template_mapping.get(role_id, 'home.html')
+        template = template_mapping.get(g.role_id, 'home.html')
         is_logged_in = True
     else:
         template = 'home.html'
@@ -68,8 +80,8 @@ def menu():
 @app.route('/call-waiter')
 def call_waiter():
     """
-    If a user is logged in, the function changes the 'needs_waiter' status 
-    in the database for that user. Then, it determines the template to render 
+    If a user is logged in, the function adds them to the waiter-call queue unless
+    they are already waiting for a waiter. Then, it determines the template to render 
     based on the user's role_id. If the user is not logged in, it renders the 
     default 'home.html' template.
 
@@ -81,33 +93,91 @@ def call_waiter():
     is_logged_in = 'user_id' in session
 
     if user_id != None: 
-        db_manager.change_needs_waiter(user_id)
+        db_manager.call_waiter(user_id)
 
-    role_id = DatabaseManager.get_role_id(user_id)
-    template = template_mapping.get(role_id, 'home.html')
+    template = template_mapping.get(g.role_id, 'home.html')
 
     return render_template(template, is_logged_in=is_logged_in)
 
 @app.route('/view-orders')
+@role_required(2, 3, 4, redirect_to='my_orders')
 def show_orders():
     """
-    Route to view all orders.
+    Route to view orders, one page at a time.
 
     Retrieves the user's role ID from the session and checks if user is staff. If so, it fetches 
-    all orders from the database and renders them using the 'orders.html' template. If the user
+    a page of orders from the database and renders them using the 'orders.html' template. If the user
     is a customer, it redirects them to the '/my-orders' page.
 
         Returns:
             str/Response: The rendered HTML content of the orders page as staff or a redirects to page
             to view their orders as a customer.
     """
-    user_id = session.get('user_id')
-    role_id = db_manager.get_role_id(user_id)
-    if role_id > 1:
-        orders = db_manager.get_all_orders()
-        return render_template('orders.html', orders=orders)
-    else:
-        return redirect('/my-orders', 302)
+    after_id, limit, status = get_order_page_args()
+    orders, next_after_id = db_manager.get_orders_page(after_id, limit, status)
+    return render_template('orders.html', orders=orders, next_after_id=next_after_id, limit=limit,
+                           status=status, order_statuses=order_statuses)
+
+@app.route('/api/orders')
+@login_required
+def api_orders():
+    """
+    Returns one page of orders as JSON for staff, using the same 'after', 'limit' and
+    'status' query parameters as the '/view-orders' page.
+
+        Returns:
+            Response: JSON with the orders on the page and the 'next_after_id' for the following page.
+    """
+    if g.role_id <= 1:
+        return jsonify({"error": "Staff only"}), 403
+
+    after_id, limit, status = get_order_page_args()
+    orders, next_after_id = db_manager.get_orders_page(after_id, limit, status)
+    return jsonify({
+        "orders": [{
+            "order_id": order['order_id'],
+            "order_date": str(order['order_date']),
+            "email": order['email'],
+            "table_number": order['table_number'],
+            "total": order['total'],
+            "order_status": order['order_status'],
+            "user_id": order['user_id']
+        } for order in orders],
+        "next_after_id": next_after_id
+    })
+
+@app.route('/stream/orders')
+@login_required
+@role_required(2, 3, 4)
+def stream_orders():
+    """
+    Streams order changes to kitchen and waiter screens as server-sent events.
+
+    Events are 'order_created', 'order_status_changed' and 'order_deleted', fired when
+    orders are written through the DatabaseManager. Screens apply them to the page they
+    already have instead of reloading it. A reconnecting screen sends the 'Last-Event-ID'
+    header and is sent the events it missed.
+
+        Returns:
+            Response: A text/event-stream response that stays open.
+    """
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    return Response(order_events.stream(last_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def get_order_page_args():
+    """
+    Reads the order listing page parameters from the query string.
+
+        Returns:
+            tuple: (after_id, limit, status) where after_id and status are None when not given and
+            limit is clamped to between 1 and ORDERS_MAX_PAGE_SIZE.
+    """
+    after_id = request.args.get('after', type=int)
+    limit = request.args.get('limit', ORDERS_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, ORDERS_MAX_PAGE_SIZE))
+    status = request.args.get('status') or None
+    return after_id, limit, status
 
 @app.route('/update-status/<int:order_id>', methods=['POST'])
 def update_order_status(order_id):
@@ -257,6 +327,7 @@ def create_menu_item():
 
 @app.route('/view-tables', methods=['GET', 'POST'])
 @login_required
+@role_required(2, redirect_to='index')
 def view_tables():
     """
     Route to view assigned tables and their corresponding orders as a waiter.
@@ -265,18 +336,9 @@ def view_tables():
             str: The rendered 'waiter-tables.html' template.
     """
     user_id = session.get('user_id')
-    role_id = db_manager.get_role_id(user_id)
-    if role_id != 2:
-        return redirect(url_for('index'))
-
-    assigned_tables_bitmask = db_manager.get_waiter_tables(user_id)
-    assigned_tables = db_manager.decode_bitmask(assigned_tables_bitmask)
 
-    tables_with_orders = {}
-    for table in assigned_tables:
-        orders = db_manager.get_orders_by_table(table)
-        detailed_orders = [db_manager.get_order(order['order_id']) for order in orders]
-        tables_with_orders[table] = detailed_orders
+    # Loads every assigned table's orders and their items in a fixed number of queries
+    tables_with_orders = db_manager.get_waiter_orders_by_table(user_id)
 
     return render_template('waiter-tables.html', tables_with_orders=tables_with_orders)
 
@@ -300,30 +362,31 @@ def create_order():
     table_number = payload.get('tableNumber')
     order_items = payload.get('orderItems', [])
 
-    menu_items = db_manager.get_all_menu_items()
-    menu_items_dict = {item['menu_item_name']: {'id': item['menu_item_id'], 'price': item['menu_item_price']} for item
-                       in menu_items}
+    # Name lookups come from the index built once per menu version
+    menu_items_by_name = db_manager.get_menu().by_name
 
     total_price = 0
-
+    lines = []
 
     for item in order_items:
         name = item["name"]
         quantity = item["quantity"]
-        if name in menu_items_dict:
-            price = menu_items_dict[name]['price']
-            total_price += price * quantity
+        if name in menu_items_by_name:
+            menu_item = menu_items_by_name[name]
+            total_price += menu_item['menu_item_price'] * quantity
+            lines.append((menu_item['menu_item_id'], quantity))
         else:
             return jsonify({"status": "error", "message": f"Item '{name}' not found in the menu."}), 400
 
-    order_id = db_manager.create_order(current_date, g.user['email'], table_number, total_price, g.user['user_id'])
-
-    for item in order_items:
-        name = item["name"]
-        quantity = item["quantity"]
-        if name in menu_items_dict:
-            menu_item_id = menu_items_dict[name]['id']
-            db_manager.insert_order_item(order_id, menu_item_id, quantity)
+    # Writes the order and all of its items in one transaction
+    header = {
+        'order_date': current_date,
+        'email': g.user['email'],
+        'table_number': table_number,
+        'total': total_price,
+        'user_id': g.user['user_id']
+    }
+    db_manager.place_order(header, lines)
 
     return jsonify({"status": "success", "message": "Order processed successfully."})
 
@@ -350,6 +413,7 @@ def view_order(order_id):
 
 @app.route('/edit-waiter-tables', methods=['GET', 'POST'])
 @login_required
+@role_required(2, redirect_to='index')
 def edit_waiter_tables():
     """
     Route for editing tables assigned to a waiter.
@@ -363,26 +427,17 @@ def edit_waiter_tables():
             Response/str: Redirects to 'edit_waiter_tables' or renders 'assign_tables.html' template.
     """
     user_id = session.get('user_id')
-    role_id = db_manager.get_role_id(user_id)
-
-    if role_id != 2:
-        return redirect(url_for('index'))
 
     if request.method == 'POST':
-        new_tables = request.form.getlist('tables')
-        new_tables_set = set(map(int, new_tables))
-
-        current_bitmask = db_manager.get_waiter_tables(user_id)
-        current_tables = db_manager.decode_bitmask(current_bitmask)
-        db_manager.remove_waiter_tables(user_id, current_tables)
-
-        db_manager.add_waiter_tables(user_id, new_tables_set)
+        try:
+            db_manager.replace_waiter_tables(user_id, request.form.getlist('tables'))
+        except ValueError as e:
+            return str(e), 400
 
         return redirect(url_for('edit_waiter_tables'))
 
-    current_bitmask = db_manager.get_waiter_tables(user_id)
-    current_tables = db_manager.decode_bitmask(current_bitmask)
-    all_tables = set(range(1, 21))  # Assuming there are 20 tables in total
+    current_tables = set(db_manager.get_assigned_tables(user_id))
+    all_tables = range(1, app.config['TABLE_COUNT'] + 1)
 
     return render_template('assign_tables.html', current_tables=current_tables, all_tables=all_tables)
 
@@ -459,23 +514,40 @@ def calling_waiter():
 @login_required
 def calling_waiter_edit_table():
     """
-    Retrieves customers that require the waiter from the database. If request method
-    is POST, it will retrieve the user ID from submitted form and changes status
-    the need for the waiter for the customer.
+    Acknowledges one or more waiter calls in a single transaction. The calls are read from
+    'call_ids' in a JSON body or form, and a single 'user_id' is still accepted for older
+    screens, which acknowledges that customer's open calls.
 
         Returns:
-            str: The rendered 'calling-waiter-list.html' template.
+            Response/str: JSON with the number of acknowledged calls for JSON requests, otherwise
+            the rendered 'calling-waiter-list.html' template.
     """
-    customers = db_manager.get_customers_need_waiter()
-
-    if request.method == "POST":
+    data = request.get_json(silent=True)
+    if data is not None:
+        call_ids = data.get('call_ids') or []
+        user_id = data.get('user_id')
+    else:
+        call_ids = request.form.getlist('call_ids')
         user_id = request.form.get('user_id')
-        db_manager.change_needs_waiter(user_id)
 
-    return render_template('calling-waiter-list.html', customers=customers)
+    try:
+        call_ids = [int(call_id) for call_id in call_ids]
+    except (TypeError, ValueError):
+        return jsonify({"error": "call_ids must be a list of integers"}), 400
+
+    if user_id is not None and not call_ids:
+        call_ids = [call['call_id'] for call in db_manager.get_open_waiter_calls()
+                    if str(call['user_id']) == str(user_id)]
+
+    acknowledged = db_manager.acknowledge_waiter_calls(call_ids)
+
+    if data is not None:
+        return jsonify({"acknowledged": acknowledged})
+    return render_template('calling-waiter-list.html', customers=db_manager.get_customers_need_waiter())
 
 @app.route('/manage-users', methods=["POST", "GET"])
 @login_required
+@role_required(4)
 def manager_users():
     """
     Ensures that the user is a Manager then retrieves all users from the database. If
@@ -487,14 +559,7 @@ def manager_users():
             Response/str: JSON response indicating the result of the action of the manager or
             the rendered 'manage_users.html' template.
     """
-    user_id = session.get('user_id')
-
-    role_id = db_manager.get_role_id(user_id)
-    if role_id == 4:
-        users = db_manager.get_all_users()
-    else:
-        return render_template('404.html'), 404
-
+    users = db_manager.get_all_users()
 
     if request.method == "POST":
         data = request.get_json()
@@ -525,15 +590,17 @@ def view_order_times():
     """
     Route for viewing order times as kitchen staff.
 
-    Retrieves all orders from the database and renders the 'order_times.html' template
-    with the retrieved orders.
+    Retrieves one page of orders from the database, newest first, and renders the
+    'order_times.html' template with the retrieved orders.
 
         Returns:
             str: The rendered 'order_times.html' template.
     """
-    orders = db_manager.get_all_orders()
-    
-    return render_template('order_times.html', orders=orders)
+    after_id, limit, status = get_order_page_args()
+    orders, next_after_id = db_manager.get_orders_page(after_id, limit, status)
+
+    return render_template('order_times.html', orders=orders, next_after_id=next_after_id, limit=limit,
+                           status=status, order_statuses=order_statuses)
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -3,16 +3,15 @@ import functools
 from flask import (
     Blueprint, flash, g, redirect, render_template, request, session, url_for
 )
-from flask_bcrypt import Bcrypt
-
 from src.db import get_db
 
 from src.database_manager import DatabaseManager
 
-from flask_bcrypt import bcrypt
+from src.passwords import password_hasher, needs_rehash, HasherBusy
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
-bcrypt = Bcrypt()
+
+BUSY_MESSAGE = 'We are signing in a lot of people right now. Please try again in a moment.'
 
 
 @bp.route('/register', methods=('GET', 'POST'))
@@ -39,8 +38,10 @@ def register():
 
         if error is None:
             try:
-                hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
+                hashed_password = password_hasher.hash(password)
                 DatabaseManager.create_user(name, username, hashed_password, 1, email)
+            except HasherBusy:
+                return busy_response('register.html')
             except db.IntegrityError:
                 error = "Username or Email is already registered."
             else:
@@ -69,10 +70,16 @@ def login():
             'SELECT * FROM users WHERE username = ?', (username,)
         ).fetchone()
 
-        if user is None:
-            error = 'Incorrect username/password.'
-        elif not bcrypt.check_password_hash(user['password'], password):
-            error = 'Incorrect username/password.'
+        try:
+            if user is None:
+                error = 'Incorrect username/password.'
+            elif not password_hasher.check(user['password'], password):
+                error = 'Incorrect username/password.'
+            elif needs_rehash(user['password']):
+                # The configured cost factor has changed since this password was hashed
+                DatabaseManager.update_user_password(user['user_id'], password_hasher.hash(password))
+        except HasherBusy:
+            return busy_response('login.html')
 
         if error is None:
             session.clear()
@@ -83,19 +90,31 @@ def login():
 
     return render_template('login.html')
 
+def busy_response(template):
+    """
+    Turns a request away when the password hashing pool is full, instead of queueing it.
+
+    :param template: The form template to show again.
+    :return: The form with an error message and a 503 status.
+    """
+    flash(BUSY_MESSAGE)
+    return render_template(template), 503, {'Retry-After': '1'}
+
 @bp.before_app_request
 def load_logged_in_user():
     """
     Load the logged-in user's information before each request, if they're logged in.
+    The user row and role are kept on 'g' so views do not need to look them up again.
+    Anonymous users get the customer role.
     """
     user_id = session.get('user_id')
 
     if user_id is None:
         g.user = None
     else:
-        g.user = get_db().execute(
-            'SELECT * FROM users WHERE user_id = ?', (user_id,)
-        ).fetchone()
+        g.user = DatabaseManager.get_user(user_id)
+
+    g.role_id = g.user['role_id'] if g.user is not None else 1
 
 @bp.route('/logout')
 def logout():
@@ -124,3 +143,25 @@ def login_required(view):
     return wrapped_view
 
 
+def role_required(*role_ids, redirect_to=None):
+    """
+    View decorator that only lets users with one of the given roles through, using the role
+    loaded for the request by `load_logged_in_user`.
+
+    :param role_ids: The role IDs allowed to use the view.
+    :param redirect_to: The endpoint other users are redirected to. If omitted they get the 404 page.
+    :return: The decorator.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped_view(**kwargs):
+            if g.role_id not in role_ids:
+                if redirect_to is not None:
+                    return redirect(url_for(redirect_to))
+                return render_template('404.html'), 404
+
+            return view(**kwargs)
+
+        return wrapped_view
+
+    return decorator
@@ -0,0 +1,93 @@
+"""
+Compares request throughput under concurrent readers and writers with a fresh rollback-journal
+connection per request against pooled connections tuned with DEFAULT_PRAGMAS (WAL).
+
+Each simulated request opens an application context, reads a page of orders and, for one
+request in every --write-every, updates an order status.
+
+Run from the repository root:
+
+    python -m src.benchmarks.bench_connections --workers 16 --requests 300
+"""
+import argparse
+import sqlite3
+import threading
+import time
+
+from src.benchmarks.common import make_app, seed_orders, percentile, ORDER_STATUSES
+from src.database_manager import DatabaseManager
+from src.db import get_db, get_pool_stats, DEFAULT_PRAGMAS, pool
+
+
+def run(label, workers, requests, write_every, orders, **config):
+    """
+    Runs the simulated requests from several threads and prints throughput, latency and lock errors.
+
+        Parameters:
+            label (str): The label printed for this run.
+            workers (int): The number of concurrent threads.
+            requests (int): The number of requests each thread makes.
+            write_every (int): One request in this many also writes.
+            orders (int): The number of orders seeded before the run.
+            **config: Configuration for the application, e.g. SQLITE_PRAGMAS and SQLITE_POOL_SIZE.
+    """
+    app = make_app(**config)
+    with app.app_context():
+        seed_orders(get_db(), orders)
+    pool.clear()
+    before = get_pool_stats()
+    manager = DatabaseManager()
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    barrier = threading.Barrier(workers)
+
+    def worker(number):
+        local = []
+        barrier.wait()
+        for i in range(requests):
+            start = time.perf_counter()
+            try:
+                with app.app_context():
+                    manager.get_orders_page(None, 50)
+                    if i % write_every == number % write_every:
+                        manager.update_order(1 + (number * requests + i) % orders, ORDER_STATUSES[i % 4])
+            except sqlite3.OperationalError:
+                with lock:
+                    errors[0] += 1
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"{label:>10}: {workers * requests / elapsed:8.1f} requests/s  "
+          f"p50 {percentile(latencies, 50) * 1000:7.2f} ms  p99 {percentile(latencies, 99) * 1000:8.2f} ms  "
+          f"locked errors {errors[0]}")
+    after = get_pool_stats()
+    return {name: after[name] - before[name] for name in ('created', 'reused', 'discarded')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=16, help='concurrent threads')
+    parser.add_argument('--requests', type=int, default=300, help='requests made by each thread')
+    parser.add_argument('--write-every', type=int, default=5, help='one request in this many writes')
+    parser.add_argument('--orders', type=int, default=10000, help='orders seeded before the run')
+    args = parser.parse_args()
+
+    run('no pool', args.workers, args.requests, args.write_every, args.orders,
+        SQLITE_PRAGMAS={'journal_mode': 'DELETE', 'synchronous': 'FULL'}, SQLITE_POOL_SIZE=0)
+    stats = run('pooled WAL', args.workers, args.requests, args.write_every, args.orders,
+                SQLITE_PRAGMAS=DEFAULT_PRAGMAS, SQLITE_POOL_SIZE=args.workers)
+    print(f"pool activity during the pooled run: {stats}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Measures how quickly an order event reaches every connected screen when many screens
+are streaming from one process.
+
+Run from the repository root:
+
+    python -m src.benchmarks.bench_order_stream --screens 200 --events 200
+"""
+import argparse
+import threading
+import time
+
+from src.benchmarks.common import percentile
+from src.events import OrderEventBroker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--screens', type=int, default=200, help='connected screens')
+    parser.add_argument('--events', type=int, default=200, help='events published')
+    args = parser.parse_args()
+
+    broker = OrderEventBroker()
+    delays = []
+    lock = threading.Lock()
+    ready = threading.Barrier(args.screens + 1)
+
+    def screen():
+        stream = broker.stream(keepalive=60)
+        next(stream)
+        ready.wait()
+        local = []
+        for _ in range(args.events):
+            message = next(stream)
+            sent = float(message.rsplit('"sent": ', 1)[1].split('}', 1)[0])
+            local.append(time.perf_counter() - sent)
+        stream.close()
+        with lock:
+            delays.extend(local)
+
+    threads = [threading.Thread(target=screen) for _ in range(args.screens)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    started = time.perf_counter()
+    for n in range(args.events):
+        broker.publish('order_status_changed', {"order_id": n, "sent": time.perf_counter()})
+        time.sleep(0.001)
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"{args.screens} screens, {args.events} events: {len(delays) / elapsed:9.0f} deliveries/s  "
+          f"p50 {percentile(delays, 50) * 1000:7.2f} ms  p99 {percentile(delays, 99) * 1000:7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Shows that DatabaseManager.get_orders_page costs the same no matter how many orders exist,
+while get_all_orders grows with the order history.
+
+Run from the repository root:
+
+    python -m src.benchmarks.bench_orders_page --sizes 10000 100000 1000000
+"""
+import argparse
+
+from src.benchmarks.common import make_app, seed_orders, time_calls, percentile
+from src.database_manager import DatabaseManager
+from src.db import get_db
+
+
+def report(label, samples):
+    print(f"    {label:<28} p50 {percentile(samples, 50) * 1000:9.3f} ms  p99 {percentile(samples, 99) * 1000:9.3f} ms")
+
+
+def run(size, repeat, full_repeat):
+    """
+    Seeds a database with a number of orders and times the first, a deep and a filtered page.
+
+        Parameters:
+            size (int): The number of orders to seed.
+            repeat (int): The number of timed calls per page query.
+            full_repeat (int): The number of timed calls to get_all_orders.
+    """
+    app = make_app()
+    with app.app_context():
+        db = get_db()
+        seed_orders(db, size)
+        manager = DatabaseManager()
+        print(f"{size} orders")
+
+        report('first page', time_calls(lambda: manager.get_orders_page(None, 50), repeat))
+        report('page near the oldest order', time_calls(lambda: manager.get_orders_page(100, 50), repeat))
+        report('filtered first page', time_calls(
+            lambda: manager.get_orders_page(None, 50, 'The order is in the kitchen!'), repeat))
+        report('filtered deep page', time_calls(
+            lambda: manager.get_orders_page(size // 2, 50, 'The order is in the kitchen!'), repeat))
+        if full_repeat:
+            report('get_all_orders', time_calls(manager.get_all_orders, full_repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help='numbers of orders to seed')
+    parser.add_argument('--repeat', type=int, default=200, help='timed calls per page query')
+    parser.add_argument('--full-repeat', type=int, default=3,
+                        help='timed calls to get_all_orders (0 to skip)')
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.repeat, args.full_repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Measures login throughput (bcrypt checks per second, and per core) at several cost factors,
+checking inline on each request thread versus on the bounded hashing pool in src/passwords.py.
+Requests turned away by the pool's pending limit are counted as rejected.
+
+Run from the repository root:
+
+    python -m src.benchmarks.bench_password_hashing --rounds 10 12 --clients 30
+"""
+import argparse
+import os
+import threading
+import time
+
+import bcrypt
+
+from src.benchmarks.common import percentile
+from src.passwords import PasswordHasher, HasherBusy
+
+
+def run(label, check, clients, logins):
+    """
+    Runs logins from several client threads at once and prints throughput and latency.
+
+        Parameters:
+            label (str): The label printed for this run.
+            check (callable): Checks one password, raising HasherBusy when turned away.
+            clients (int): The number of concurrent clients.
+            logins (int): The number of logins each client makes.
+    """
+    latencies = []
+    rejected = [0]
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients)
+
+    def client():
+        local = []
+        barrier.wait()
+        for _ in range(logins):
+            start = time.perf_counter()
+            try:
+                check()
+            except HasherBusy:
+                with lock:
+                    rejected[0] += 1
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    cores = os.cpu_count() or 1
+    completed = clients * logins - rejected[0]
+    print(f"    {label:<8} {completed / elapsed:7.1f} logins/s  {completed / elapsed / cores:7.1f} per core  "
+          f"p50 {percentile(latencies, 50) * 1000:8.1f} ms  p99 {percentile(latencies, 99) * 1000:8.1f} ms  "
+          f"rejected {rejected[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, nargs='+', default=[10, 12], help='bcrypt cost factors')
+    parser.add_argument('--clients', type=int, default=30, help='concurrent logins')
+    parser.add_argument('--logins', type=int, default=3, help='logins per client')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='hashing pool threads')
+    parser.add_argument('--max-pending', type=int, default=None, help='hashing pool pending limit')
+    args = parser.parse_args()
+
+    hasher = PasswordHasher()
+    hasher.configure(args.workers, args.max_pending or args.workers * 4)
+    print(f"{os.cpu_count()} cores, {args.clients} clients, pool of {args.workers} workers")
+
+    for rounds in args.rounds:
+        stored = bcrypt.hashpw(b"Password123!", bcrypt.gensalt(rounds))
+        print(f"cost {rounds}")
+        run('inline', lambda: bcrypt.checkpw(b"Password123!", stored), args.clients, args.logins)
+        run('pool', lambda: hasher.check(stored.decode('utf-8'), "Password123!"), args.clients, args.logins)
+
+
+if __name__ == '__main__':
+    main()
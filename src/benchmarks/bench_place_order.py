@@ -0,0 +1,83 @@
+"""
+Compares the old order write path (create_order followed by one insert_order_item per line)
+with DatabaseManager.place_order, which writes the whole order in one transaction.
+
+Run from the repository root:
+
+    python -m src.benchmarks.bench_place_order --workers 20 --orders 50 --lines 10
+"""
+import argparse
+import threading
+
+from src.benchmarks.common import make_app, percentile, count_statements, run_concurrent
+from src.database_manager import DatabaseManager
+
+
+def legacy_order(header, lines):
+    order_id = DatabaseManager.create_order(header['order_date'], header['email'], header['table_number'],
+                                            header['total'], header['user_id'])
+    for menu_item_id, quantity in lines:
+        DatabaseManager.insert_order_item(order_id, menu_item_id, quantity)
+    return order_id
+
+
+def batched_order(header, lines):
+    return DatabaseManager.place_order(header, lines)
+
+
+def run(name, place, workers, orders, line_count):
+    """
+    Places orders from several concurrent customers and prints commits per order and latency.
+
+        Parameters:
+            name (str): The label printed for this run.
+            place (callable): Places one order given a header and its lines.
+            workers (int): The number of concurrent customers.
+            orders (int): The number of orders each customer places.
+            line_count (int): The number of line items per order.
+    """
+    app = make_app()
+    with app.app_context():
+        manager = DatabaseManager()
+        for n in range(line_count):
+            manager.create_menu_item(f"Dish{n}", "Description", 9.99, "Ingredients", 500, None, "main")
+
+    counters = []
+    lock = threading.Lock()
+
+    def on_connect(db):
+        with lock:
+            counters.append(count_statements(db, 'COMMIT'))
+
+    def operation(worker, iteration):
+        header = {
+            'order_date': '2024-01-01 19:00:00',
+            'email': f'customer{worker}@email.com',
+            'table_number': worker % 20 + 1,
+            'total': 9.99 * line_count,
+            'user_id': worker + 1
+        }
+        place(header, [(menu_item_id, 1) for menu_item_id in range(1, line_count + 1)])
+
+    latencies, elapsed = run_concurrent(app, workers, orders, operation, on_connect)
+    total_orders = workers * orders
+    commits = sum(counter[0] for counter in counters)
+    print(f"{name:>8}: {commits / total_orders:5.1f} commits/order  "
+          f"p50 {percentile(latencies, 50) * 1000:7.2f} ms  "
+          f"p99 {percentile(latencies, 99) * 1000:7.2f} ms  "
+          f"{total_orders / elapsed:8.1f} orders/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=20, help='concurrent customers')
+    parser.add_argument('--orders', type=int, default=50, help='orders placed by each customer')
+    parser.add_argument('--lines', type=int, default=10, help='line items per order')
+    args = parser.parse_args()
+
+    run('before', legacy_order, args.workers, args.orders, args.lines)
+    run('after', batched_order, args.workers, args.orders, args.lines)
+
+
+if __name__ == '__main__':
+    main()
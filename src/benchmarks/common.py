@@ -0,0 +1,168 @@
+import os
+import random
+import tempfile
+import threading
+import time
+
+from flask import Flask
+
+from src.db import init_db, init_app, get_db
+
+
+def make_app(database=None, **config):
+    """
+    Creates a bare Flask application pointing at a throwaway database for benchmarking.
+
+        Parameters:
+            database (str, optional): Path of the database file. A new temporary file is used if omitted.
+            **config: Extra configuration values, e.g. SQLITE_PRAGMAS.
+
+        Returns:
+            app (Flask): The configured application with a freshly initialised schema.
+    """
+    if database is None:
+        database = os.path.join(tempfile.mkdtemp(prefix='bench-'), 'bench.db')
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config['DATABASE'] = database
+    app.config.update(config)
+    init_app(app)
+    with app.app_context():
+        init_db(database)
+    return app
+
+
+ORDER_STATUSES = [
+    'Order confirmed!',
+    'The order is in the kitchen!',
+    'The order is ready and will be with you shortly!',
+    'The order has been delivered!',
+    'The order has been Paid!'
+]
+
+
+def seed_orders(db, count, tables=20, users=1000, batch_size=50000, seed=42):
+    """
+    Inserts synthetic orders in large batches inside a single transaction.
+
+        Parameters:
+            db (sqlite3.Connection): The connection to write to.
+            count (int): The number of orders to insert.
+            tables (int): Orders are spread over table numbers 1 to tables.
+            users (int): Orders are spread over user IDs 1 to users.
+            batch_size (int): The number of rows passed to each executemany call.
+            seed (int): The random seed, so that runs are repeatable.
+    """
+    rng = random.Random(seed)
+
+    def rows(start, stop):
+        for n in range(start, stop):
+            user_id = rng.randint(1, users)
+            yield (f'2024-01-01 {n // 3600 % 24:02d}:{n // 60 % 60:02d}:{n % 60:02d}',
+                   f'customer{user_id}@email.com', rng.randint(1, tables),
+                   round(rng.uniform(5, 80), 2), user_id, rng.choice(ORDER_STATUSES))
+
+    with db:
+        for start in range(0, count, batch_size):
+            db.executemany(
+                "INSERT INTO orders (order_date, email, table_number, total, user_id, order_status) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows(start, min(start + batch_size, count)))
+
+
+def time_calls(operation, repeat):
+    """
+    Calls an operation repeatedly and records how long each call took.
+
+        Parameters:
+            operation (callable): The call to time, taking no arguments.
+            repeat (int): The number of calls.
+
+        Returns:
+            list of float: The duration of each call in seconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(samples, pct):
+    """
+    Returns the given percentile of a list of samples using the nearest-rank method.
+
+        Parameters:
+            samples (list of float): The measured values.
+            pct (float): The percentile to return, between 0 and 100.
+
+        Returns:
+            float: The percentile value, or 0.0 when there are no samples.
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def count_statements(db, keyword):
+    """
+    Starts counting the statements executed on a connection that begin with a keyword.
+
+        Parameters:
+            db (sqlite3.Connection): The connection to trace.
+            keyword (str): The statement keyword to count, e.g. 'COMMIT'.
+
+        Returns:
+            list: A one-element list holding the running count.
+    """
+    counter = [0]
+    keyword = keyword.upper()
+
+    def trace(statement):
+        if statement.lstrip().upper().startswith(keyword):
+            counter[0] += 1
+
+    db.set_trace_callback(trace)
+    return counter
+
+
+def run_concurrent(app, workers, iterations, operation, on_connect=None):
+    """
+    Runs an operation from several threads at once, each inside its own application context.
+
+        Parameters:
+            app (Flask): The application whose database is used.
+            workers (int): The number of concurrent threads.
+            iterations (int): How many times each thread runs the operation.
+            operation (callable): Called with the worker number and iteration number.
+            on_connect (callable, optional): Called with each thread's connection before it starts.
+
+        Returns:
+            tuple: (latencies in seconds, total elapsed seconds)
+    """
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(workers)
+
+    def worker(number):
+        with app.app_context():
+            local = []
+            if on_connect is not None:
+                on_connect(get_db())
+            barrier.wait()
+            for i in range(iterations):
+                start = time.perf_counter()
+                operation(number, i)
+                local.append(time.perf_counter() - start)
+            with lock:
+                latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - started
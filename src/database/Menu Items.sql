@@ -1,6 +1,4 @@
-DROP TABLE IF EXISTS menu_items;
-
-CREATE TABLE menu_items (
+CREATE TABLE IF NOT EXISTS menu_items (
   menu_item_id INTEGER PRIMARY KEY AUTOINCREMENT,
   menu_item_name VARCHAR(255) NOT NULL,
   menu_item_description TEXT NOT NULL,
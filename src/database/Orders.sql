@@ -1,6 +1,4 @@
-DROP TABLE IF EXISTS orders;
-
-CREATE TABLE orders (
+CREATE TABLE IF NOT EXISTS orders (
   order_id INTEGER PRIMARY KEY AUTOINCREMENT,
   order_date TIMESTAMP NOT NULL,
   email TEXT REFERENCES users(email),
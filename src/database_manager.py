@@ -1,6 +1,12 @@
 import sqlite3
+from datetime import datetime
 from flask import g, current_app
-from src.db import get_db
+from src.db import get_db, close_db
+from src.menu_cache import MenuCache
+from src.user_cache import user_cache
+from src.events import publish_order_created, publish_order_status_changed, publish_order_deleted
+
+DEFAULT_TABLE_COUNT = 20
 
 
 class DatabaseManager:
@@ -9,48 +15,37 @@ class DatabaseManager:
 
         Attributes:
             database_name (str): Name of the database file to connect to.
-            db_connection (sqlite3.connection): A connenction object to the database.
-             db (Sqlite3 Database): The SQLite3 database object. Initially None, set when `get_db` is called.
+            menu_cache (MenuCache): The versioned in-process cache of the menu.
 
 
     """
     def __init__(self, database_name=":memory:"):
         """
-        Setups the DatabaseManager with a connection to the SQLite database.
+        Setups the DatabaseManager. Connections are taken from the pool in 'db.py' when
+        a method first needs one, so no connection is opened here.
 
             Parameters:
                 database_name (str): The name of the database file. Defaults to an in-memory database.
 
         """
-        self.db_connection = sqlite3.connect(database_name)
-        self.db = None
+        self.database_name = database_name
+        self.menu_cache = MenuCache()
 
     def get_db(self):
         """
-        Gets the database connection. If not already setup within the application, a new connection is created and stored.
+        Gets the pooled database connection for the current application context.
 
             Returns:
-                self.db (sqlite3.Database): The SQLite3 database object.
+                sqlite3.Connection: The SQLite3 database connection.
 
         """
-        if 'db' not in g:
-            app_context = current_app.app_context()
-            app_context.push()
-            self.db = sqlite3.connect(
-                self.database_name,
-                detect_types=sqlite3.PARSE_DECLTYPES
-            )
-            self.db.row_factory = sqlite3.Row
-
-        return self.db
+        return get_db()
     
     def close_db(self):
         """
-        Closes the database connection if it exists.
+        Returns the current application context's connection to the pool, if it has one.
         """
-        if self.db is not None:
-            self.db.close()
-            g.pop('db', None)
+        close_db()
 
     @staticmethod
     def create_user(full_name, username, password, role_id, email):
@@ -91,6 +86,9 @@ class DatabaseManager:
                 (order_date, email, table_number, total, user_id, 'Order confirmed!'))
         db.commit()
         order_id = cursor.lastrowid
+        publish_order_created({'order_id': order_id, 'order_date': order_date, 'email': email,
+                               'table_number': table_number, 'total': total, 'user_id': user_id,
+                               'order_status': 'Order confirmed!'})
         return order_id
 
 
@@ -109,7 +107,36 @@ class DatabaseManager:
         cursor.execute(
                 "INSERT INTO order_items (order_id, menu_item_id, quantity) VALUES (?, ?, ?)", (order_id, menu_item_id, quantity))
         db.commit()
-    
+
+    @staticmethod
+    def place_order(header, lines):
+        """
+        Inserts an order and all of its line items in a single transaction.
+
+        The order row and every order item are either all written or, if anything fails,
+        none of them are. The line items are written with one bulk insert.
+
+            Parameters:
+                header (dict): The order details with the keys 'order_date', 'email',
+                               'table_number', 'total' and 'user_id'.
+                lines (iterable of tuple): (menu_item_id, quantity) pairs for the order.
+
+            Returns:
+                order_id (int): The ID of the newly created order.
+        """
+        db = get_db()
+        with db:
+            cursor = db.execute(
+                "INSERT INTO orders (order_date, email, table_number, total, user_id, order_status) VALUES (?, ?, ?, ?, ?, ?)",
+                (header['order_date'], header['email'], header['table_number'], header['total'],
+                 header['user_id'], 'Order confirmed!'))
+            order_id = cursor.lastrowid
+            db.executemany(
+                "INSERT INTO order_items (order_id, menu_item_id, quantity) VALUES (?, ?, ?)",
+                [(order_id, menu_item_id, quantity) for menu_item_id, quantity in lines])
+        publish_order_created(dict(header, order_id=order_id, order_status='Order confirmed!'))
+        return order_id
+
     @staticmethod
     def get_order_items(order_id):
         """
@@ -149,6 +176,7 @@ class DatabaseManager:
             (name, description, price, ingredients, calorie, image_url, category)
         )
         db.commit()
+        self.menu_cache.invalidate()
 
 
     def get_all_orders(self):
@@ -165,6 +193,47 @@ class DatabaseManager:
         return orders
 
 
+    def get_orders_page(self, after_id=None, limit=50, status_filter=None):
+        """
+        Retrieves one page of orders, newest first, using keyset pagination.
+
+        Each page starts directly after the last order of the previous page, so the cost of a page
+        does not depend on how many orders come before it.
+
+            Parameters:
+                after_id (int, optional): The order ID the previous page ended on. None for the first page.
+                limit (int): The maximum number of orders on the page.
+                status_filter (str, optional): Only include orders with this status.
+
+            Returns:
+                tuple: (orders, next_after_id) where orders is a list of sqlite3.Row and next_after_id
+                is the value to pass for the following page, or None when this is the last page.
+        """
+        conditions = []
+        params = []
+        if after_id is not None:
+            conditions.append("order_id < ?")
+            params.append(after_id)
+        if status_filter:
+            conditions.append("order_status = ?")
+            params.append(status_filter)
+        query = "SELECT * FROM orders"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY order_id DESC LIMIT ?"
+        # Fetches one extra row to find out whether there is another page
+        params.append(limit + 1)
+
+        db = get_db()
+        cursor = db.cursor()
+        cursor.execute(query, params)
+        orders = cursor.fetchall()
+        next_after_id = None
+        if len(orders) > limit:
+            orders = orders[:limit]
+            next_after_id = orders[-1]['order_id']
+        return orders, next_after_id
+
     def delete_order(self, order_id):
         """
         Deletes an order from the database based on its order ID.
@@ -176,6 +245,7 @@ class DatabaseManager:
         cursor = db.cursor()
         cursor.execute("DELETE FROM orders WHERE order_id = ?", (order_id,))
         db.commit()
+        publish_order_deleted(order_id)
 
 
     @staticmethod
@@ -220,6 +290,7 @@ class DatabaseManager:
         cursor.execute("")
         cursor.execute('UPDATE orders SET order_status = ? WHERE order_id = ?', (new_status, order_id))
         db.commit()
+        publish_order_status_changed(order_id, new_status)
 
 
     def delete_order(self, order_id):
@@ -233,6 +304,7 @@ class DatabaseManager:
         cursor = db.cursor()
         cursor.execute("DELETE FROM orders WHERE order_id = ?", (order_id,))
         db.commit()
+        publish_order_deleted(order_id)
 
 
     @staticmethod
@@ -252,7 +324,28 @@ class DatabaseManager:
 
     def get_all_menu_items(self):
         """
-        Retrieves all menu items from the database.
+        Retrieves all menu items, from the menu cache when it is current.
+
+            Returns:
+                menu_items (list of sqlite3.Row): A list of all menu items in the database. The list
+                is shared between callers and must not be modified.
+        """
+        return self.get_menu().items
+
+    def get_menu(self):
+        """
+        Retrieves the cached menu together with its lookup indexes, loading it from the
+        database if the menu has changed since it was last read.
+
+            Returns:
+                MenuSnapshot: The menu rows indexed by id, name and category.
+        """
+        return self.menu_cache.get(self._load_menu_items)
+
+    @staticmethod
+    def _load_menu_items():
+        """
+        Reads all menu items from the database, bypassing the cache.
 
             Returns:
                 menu_items (list of sqlite3.Row): A list of all menu items in the database.
@@ -263,6 +356,22 @@ class DatabaseManager:
         menu_items = cursor.fetchall()
         return menu_items
 
+    @property
+    def menu_version(self):
+        """
+        The version of the menu, bumped whenever a menu item is created or updated.
+        """
+        return self.menu_cache.version
+
+    def get_menu_cache_stats(self):
+        """
+        Retrieves the menu cache counters.
+
+            Returns:
+                dict: The menu version and the cache hit and miss counts.
+        """
+        return self.menu_cache.stats()
+
     @staticmethod
     def get_role_id(user_id):
         """
@@ -274,13 +383,39 @@ class DatabaseManager:
             Returns:
                 role_id (int): The role ID of the user. Defaults to 1 if user not found.
         """
+        user = DatabaseManager.get_user(user_id)
+        if user is None:
+            return 1
+        return user['role_id']
+
+    @staticmethod
+    def get_user(user_id):
+        """
+        Retrieves a user's row, from the user cache when the 'USER_CACHE_TTL' config is set
+        to a number of seconds greater than zero.
+
+            Parameters:
+                user_id (int): The user's ID.
+
+            Returns:
+                sqlite3.Row or None: The user row, or None if the user does not exist.
+        """
+        key = user_cache_key(user_id)
+        if key is None:
+            return None
+        ttl = current_app.config.get('USER_CACHE_TTL', 0)
+        if ttl > 0:
+            user = user_cache.get(key, ttl)
+            if user is not None:
+                return user
+
         db = get_db()
         cursor = db.cursor()
-        cursor.execute("SELECT role_id FROM users where user_id = ?", (user_id,))
-        role_id = cursor.fetchone()
-        if role_id is None:
-            return 1;
-        return role_id[0]
+        cursor.execute("SELECT * FROM users WHERE user_id = ?", (key,))
+        user = cursor.fetchone()
+        if user is not None and ttl > 0:
+            user_cache.put(key, user)
+        return user
 
     def create_manager_user(self):
         """
@@ -327,6 +462,7 @@ class DatabaseManager:
             (name, description, price, ingredients, calorie, image_url, category, menu_item_id)
         )
         db.commit()
+        self.menu_cache.invalidate()
 
     @staticmethod
     def delete_user(user_id):
@@ -337,8 +473,24 @@ class DatabaseManager:
                 user_id (int): The ID of the user to delete.
         """
         db = get_db()
-        db.execute('DELETE FROM users WHERE user_id = ?', (user_id,))
+        with db:
+            db.execute('DELETE FROM waiter_tables WHERE user_id = ?', (user_id,))
+            db.execute('DELETE FROM users WHERE user_id = ?', (user_id,))
+        user_cache.invalidate(user_cache_key(user_id))
+
+    @staticmethod
+    def update_user_password(user_id, password):
+        """
+        Replaces a user's password hash.
+
+            Parameters:
+                user_id (int): The ID of the user.
+                password (str): The user's new hashed password.
+        """
+        db = get_db()
+        db.execute('UPDATE users SET password = ? WHERE user_id = ?', (password, user_id))
         db.commit()
+        user_cache.invalidate(user_cache_key(user_id))
 
     @staticmethod
     def update_user_role(user_id, role_id):
@@ -352,79 +504,152 @@ class DatabaseManager:
         db = get_db()
         db.execute('UPDATE users SET role_id = ? WHERE user_id = ?', (role_id, user_id,))
         db.commit()
+        user_cache.invalidate(user_cache_key(user_id))
 
 
     @staticmethod
     def change_needs_waiter(user_id):
         """
-        Toggles the needs_waiter flag for a user in the database.
+        Toggles whether a customer needs a waiter: acknowledges their open call if they have
+        one, otherwise opens a new call for them.
 
             Parameters:
                 user_id (int): The ID of the user for whom to toggle the needs_waiter flag.
         """
         db = get_db()
         cursor = db.cursor()
-        cursor.execute("SELECT needs_waiter FROM users where user_id =?", (user_id,))
-    
-        needs_waiter = cursor.fetchone()
-        needs_waiter = needs_waiter[0]
+        cursor.execute("SELECT call_id FROM waiter_calls WHERE user_id = ? AND acknowledged_at IS NULL", (user_id,))
+        open_calls = [row[0] for row in cursor.fetchall()]
 
-        if needs_waiter == 0:
-            needs_waiter = 1
+        if open_calls:
+            DatabaseManager.acknowledge_waiter_calls(open_calls)
         else:
-            needs_waiter = 0
-        db.execute('UPDATE users SET needs_waiter=? WHERE user_id=?', (needs_waiter, user_id))
+            DatabaseManager.call_waiter(user_id)
 
-        db.commit()
+    @staticmethod
+    def call_waiter(user_id, table_number=None):
+        """
+        Adds a call to the waiter-call queue for a customer, unless they already have an open call.
+
+        The users.needs_waiter flag is kept in step with the queue in the same transaction.
+
+            Parameters:
+                user_id (int): The ID of the customer calling a waiter.
+                table_number (int, optional): The table to send the waiter to. Defaults to the
+                                              table of the customer's most recent order.
+
+            Returns:
+                int: The ID of the customer's open call.
+        """
+        db = get_db()
+        with db:
+            cursor = db.execute(
+                "SELECT call_id FROM waiter_calls WHERE user_id = ? AND acknowledged_at IS NULL", (user_id,))
+            call = cursor.fetchone()
+            if call is not None:
+                return call[0]
+
+            if table_number is None:
+                cursor = db.execute(
+                    "SELECT table_number FROM orders WHERE user_id = ? ORDER BY order_id DESC LIMIT 1", (user_id,))
+                order = cursor.fetchone()
+                table_number = order[0] if order else None
+
+            cursor = db.execute(
+                "INSERT INTO waiter_calls (table_number, user_id, created_at) VALUES (?, ?, ?)",
+                (table_number, user_id, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+            call_id = cursor.lastrowid
+            db.execute('UPDATE users SET needs_waiter = 1 WHERE user_id = ?', (user_id,))
+        user_cache.invalidate(user_cache_key(user_id))
+        return call_id
 
     @staticmethod
-    def get_customers_need_waiter():
+    def acknowledge_waiter_calls(call_ids):
         """
-        Retrieves a list of customers who have indicated that they need a waiter.
+        Marks any number of waiter calls as dealt with in one transaction. Customers left
+        with no open calls have their needs_waiter flag cleared.
+
+            Parameters:
+                call_ids (iterable of int): The IDs of the calls to acknowledge.
 
             Returns:
-                list of sqlite3.Row: A list of rows where each row contains the user_id, name, and table_number for a customer who needs a waiter.
+                int: The number of calls that were open and are now acknowledged.
+        """
+        call_ids = [int(call_id) for call_id in call_ids]
+        if not call_ids:
+            return 0
 
+        placeholders = ", ".join("?" for _ in call_ids)
+        db = get_db()
+        with db:
+            cursor = db.execute(
+                f"SELECT DISTINCT user_id FROM waiter_calls WHERE call_id IN ({placeholders}) "
+                "AND acknowledged_at IS NULL", call_ids)
+            user_ids = [row[0] for row in cursor.fetchall()]
+            cursor = db.execute(
+                f"UPDATE waiter_calls SET acknowledged_at = ? WHERE call_id IN ({placeholders}) "
+                "AND acknowledged_at IS NULL",
+                [datetime.now().strftime('%Y-%m-%d %H:%M:%S')] + call_ids)
+            acknowledged = cursor.rowcount
+            if user_ids:
+                user_placeholders = ", ".join("?" for _ in user_ids)
+                db.execute(
+                    f"UPDATE users SET needs_waiter = 0 WHERE user_id IN ({user_placeholders}) AND NOT EXISTS ("
+                    "SELECT 1 FROM waiter_calls WHERE waiter_calls.user_id = users.user_id "
+                    "AND acknowledged_at IS NULL)", user_ids)
+        for user_id in user_ids:
+            user_cache.invalidate(user_cache_key(user_id))
+        return acknowledged
+
+    @staticmethod
+    def get_open_waiter_calls():
+        """
+        Retrieves the waiter calls that have not been acknowledged yet, oldest first.
+
+            Returns:
+                list of sqlite3.Row: Rows with call_id, user_id, name, table_number and created_at.
         """
         db = get_db()
         cursor = db.cursor()
-        cursor.execute('SELECT users.user_id, users.name, orders.table_number FROM users, orders WHERE needs_waiter=TRUE')
-
-        customers = cursor.fetchall()
+        cursor.execute(
+            "SELECT wc.call_id, wc.user_id, u.name, wc.table_number, wc.created_at "
+            "FROM waiter_calls wc "
+            "LEFT JOIN users u ON u.user_id = wc.user_id "
+            "WHERE wc.acknowledged_at IS NULL "
+            "ORDER BY wc.call_id"
+        )
+        return cursor.fetchall()
 
-        return customers
+    @staticmethod
+    def get_customers_need_waiter():
+        """
+        Retrieves a list of customers who have indicated that they need a waiter.
 
-    def get_menu_item_by_id(self, menu_item_id):
-                """
-                Retrieve details of a menu item based on its menu item ID.
+            Returns:
+                list of sqlite3.Row: A list of rows where each row contains the user_id, name, and table_number for a customer who needs a waiter,
+                along with the call_id and created_at of their open call.
 
-                    Parameters:
-                        menu_item_id (int): The ID of the menu item to retrieve details for.
+        """
+        return DatabaseManager.get_open_waiter_calls()
 
-                    Returns:
-                        dict or None: A dictionary containing details of the menu item, or None if the menu item is not found.
-                """
-                db = get_db()
-                cursor = db.execute(
-                    "SELECT * FROM menu_items WHERE menu_item_id = ?",
-                    (menu_item_id,)
-                )
-                menu_item = cursor.fetchone()
-                if menu_item:
-                    menu_item_details = {
-                        'menu_item_id': menu_item['menu_item_id'],
-                        'menu_item_name': menu_item['menu_item_name'],
-                        'menu_item_description': menu_item['menu_item_description'],
-                        'menu_item_price': menu_item['menu_item_price'],
-                        'menu_item_ingredients': menu_item['menu_item_ingredients'],
-                        'menu_item_calorie': menu_item['menu_item_calorie'],
-                        'menu_item_image_url': menu_item['menu_item_image_url'],
-                        'menu_item_category': menu_item['menu_item_category']
-                    }
-                    return menu_item_details
-                return None
+    def get_menu_item_by_id(self, menu_item_id):
+        """
+        Retrieve details of a menu item based on its menu item ID.
 
+            Parameters:
+                menu_item_id (int): The ID of the menu item to retrieve details for.
 
+            Returns:
+                dict or None: A dictionary containing details of the menu item, or None if the menu item is not found.
+        """
+        try:
+            menu_item_id = int(menu_item_id)
+        except (TypeError, ValueError):
+            return None
+        menu_item = self.get_menu().by_id.get(menu_item_id)
+        if menu_item:
+            return dict(menu_item)
+        return None
 
     def get_orders_by_table(self, table_number):
         """
@@ -453,12 +678,8 @@ class DatabaseManager:
                 list: A list of all orders for the tables assigned to the waiter. Each order
                 is represented as a dictionary including the order details.
         """
-        assigned_tables = self.get_assigned_tables(user_id)
         all_orders = []
-
-        for table_number in assigned_tables:
-            orders = self.get_orders_by_table(table_number)
-
+        for orders in self.get_waiter_orders_by_table(user_id).values():
             for order in orders:
                 order_dict = {
                     "order_id": order["order_id"],
@@ -472,60 +693,112 @@ class DatabaseManager:
 
         return all_orders
 
-    @staticmethod
-    def get_waiter_tables(user_id):
+    def get_waiter_orders_by_table(self, user_id):
         """
-        Retrieves the table assignments for a waiter encoded as a bitmask.
+        Retrieves the orders, with their line items, for every table assigned to a waiter.
+
+        Uses a fixed number of queries however many tables or orders there are: one for the
+        waiter's tables and one for all of their orders joined with the order items.
 
             Parameters:
-                user_id (int): The ID of the waiter whose table assignments are to be retrieved.
+                user_id (int): The user ID of the waiter.
 
             Returns:
-                int: A bitmask representing the waiter's table assignments.
-
+                dict: Maps each assigned table number, in ascending order, to a list of order
+                dictionaries. Each order has the order columns plus an 'items' list of dictionaries
+                with 'menu_item_name', 'quantity' and 'menu_item_price'.
+        """
+        tables = self.get_assigned_tables(user_id)
+        tables_with_orders = {table: [] for table in tables}
+        if not tables:
+            return tables_with_orders
+
+        placeholders = ", ".join("?" for _ in tables)
+        query = f"""
+        SELECT o.*, oi.quantity, mi.menu_item_name, mi.menu_item_price
+        FROM orders o
+        LEFT JOIN order_items oi ON oi.order_id = o.order_id
+        LEFT JOIN menu_items mi ON mi.menu_item_id = oi.menu_item_id
+        WHERE o.table_number IN ({placeholders})
+        ORDER BY o.table_number, o.order_id, oi.order_item_id
         """
         db = get_db()
         cursor = db.cursor()
-        cursor.execute("SELECT tables_assigned FROM users WHERE user_id = ?",(user_id,))
-        tables = cursor.fetchone()[0]
-        return tables
+        cursor.execute(query, tables)
+
+        order = None
+        for row in cursor:
+            if order is None or order['order_id'] != row['order_id']:
+                order = {
+                    "order_id": row["order_id"],
+                    "order_date": row["order_date"],
+                    "email": row["email"],
+                    "table_number": row["table_number"],
+                    "total": row["total"],
+                    "user_id": row["user_id"],
+                    "order_status": row["order_status"],
+                    "items": []
+                }
+                tables_with_orders[row['table_number']].append(order)
+            if row['quantity'] is not None:
+                order['items'].append({
+                    "menu_item_name": row["menu_item_name"],
+                    "quantity": row["quantity"],
+                    "menu_item_price": row["menu_item_price"]
+                })
+        return tables_with_orders
 
     @staticmethod
-    def decode_bitmask(bitmask):
+    def get_assigned_tables(user_id):
         """
-        Decodes a bitmask into a set of table numbers.
+        Retrieves the tables assigned to a waiter.
 
             Parameters:
-                bitmask (int): A bitmask representing a set of table numbers.
+                user_id (int): The ID of the waiter.
 
             Returns:
-                set of int: The set of table numbers encoded by the bitmask.
-
+                list of int: The waiter's table numbers in ascending order.
         """
-        result = set()
-        for table_number in range(1, 21):  # MODIFY THIS TO CHANGE THE NUMBER OF TABLES
-            if bitmask & (1 << (table_number - 1)):
-                result.add(table_number)
-        return result
+        db = get_db()
+        cursor = db.cursor()
+        cursor.execute("SELECT table_number FROM waiter_tables WHERE user_id = ? ORDER BY table_number", (user_id,))
+        return [row[0] for row in cursor.fetchall()]
 
     @staticmethod
-    def encode_bitmask(input):
+    def get_table_waiters(table_number):
         """
-        Encodes a set of table numbers into a bitmask.
+        Retrieves the waiters assigned to a table.
 
             Parameters:
-                input (set of int): A set of table numbers to encode.
+                table_number (int): The table number.
 
             Returns:
-                int: A bitmask representing the set of table numbers.
+                list of int: The user IDs of the waiters serving the table.
+        """
+        db = get_db()
+        cursor = db.cursor()
+        cursor.execute("SELECT user_id FROM waiter_tables WHERE table_number = ? ORDER BY user_id", (table_number,))
+        return [row[0] for row in cursor.fetchall()]
 
+    @staticmethod
+    def replace_waiter_tables(user_id, tables):
         """
-        bitmask = 0
-        for bits in input:
-            bitmask |= 1 << (bits - 1)
-        return bitmask
+        Replaces all of a waiter's table assignments with a new set in one transaction.
+
+            Parameters:
+                user_id (int): The ID of the waiter.
+                tables (iterable of int): The table numbers the waiter should be assigned to.
+
+            Raises:
+                ValueError: If a table number is outside 1 to the 'TABLE_COUNT' config.
+        """
+        tables = DatabaseManager._check_tables(tables)
+        db = get_db()
+        with db:
+            db.execute("DELETE FROM waiter_tables WHERE user_id = ?", (user_id,))
+            db.executemany("INSERT INTO waiter_tables (user_id, table_number) VALUES (?, ?)",
+                           [(user_id, table) for table in tables])
 
-    # WARNING MAKE SURE YOU DO CHECKS BEFORE USING THIS
     def add_waiter_tables(self, user_id, assignments):
         """
         Adds table assignments to a waiter based on a list of table numbers.
@@ -534,44 +807,118 @@ class DatabaseManager:
                 user_id (int): The ID of the waiter to whom tables are being added.
                 assignments (set of int): A set containing the table numbers to add to the waiter's assignments.
 
+            Raises:
+                ValueError: If a table number is outside 1 to the 'TABLE_COUNT' config.
         """
+        tables = self._check_tables(assignments)
+        db = get_db()
+        with db:
+            db.executemany("INSERT OR IGNORE INTO waiter_tables (user_id, table_number) VALUES (?, ?)",
+                           [(user_id, table) for table in tables])
 
-        bitmask = self.get_waiter_tables(user_id)
+    def remove_waiter_tables(self, user_id, removals):
+        """
+        Removes table assignments from a waiter based on a list of table numbers.
 
-        tables = self.decode_bitmask(bitmask)
+            Parameters:
+                user_id (int): The ID of the waiter from whom the tables are being removed.
+                removals (set of int): A set containing the table numbers to remove from the waiter's assignments.
 
-        updated_tables = tables.union(set(assignments))
+        """
+        db = get_db()
+        with db:
+            db.executemany("DELETE FROM waiter_tables WHERE user_id = ? AND table_number = ?",
+                           [(user_id, int(table)) for table in set(removals)])
 
-        updated_bitmask = self.encode_bitmask(updated_tables)
+    @staticmethod
+    def get_waiter_tables(user_id):
+        """
+        Retrieves the table assignments for a waiter encoded as a bitmask. Kept for callers
+        written against the old users.tables_assigned column; use get_assigned_tables instead.
 
-        db = get_db()
-        cursor = db.cursor()
-        cursor.execute("UPDATE users SET tables_assigned = ? WHERE user_id = ?", (updated_bitmask, user_id))
-        db.commit()
+            Parameters:
+                user_id (int): The ID of the waiter whose table assignments are to be retrieved.
 
+            Returns:
+                int: A bitmask representing the waiter's table assignments.
 
-    def remove_waiter_tables(self, user_id, removals):
         """
-        Removes table assignments from a waiter based on a list of table numbers.
+        return DatabaseManager.encode_bitmask(DatabaseManager.get_assigned_tables(user_id))
+
+    @staticmethod
+    def decode_bitmask(bitmask):
+        """
+        Decodes a bitmask into a set of table numbers.
 
             Parameters:
-                user_id (int): The ID of the waiter from whom the tables are being removed.
-                removals (set of int): A set containing the table numbers to remove from the waiter's assignments.
+                bitmask (int): A bitmask representing a set of table numbers.
+
+            Returns:
+                set of int: The set of table numbers encoded by the bitmask.
 
         """
+        return {bit + 1 for bit in range(bitmask.bit_length()) if bitmask >> bit & 1}
 
-        bitmask = self.get_waiter_tables(user_id)
+    @staticmethod
+    def encode_bitmask(input):
+        """
+        Encodes a set of table numbers into a bitmask.
 
-        tables = self.decode_bitmask(bitmask)
+            Parameters:
+                input (set of int): A set of table numbers to encode.
 
-        updated_tables = tables.difference(removals)
+            Returns:
+                int: A bitmask representing the set of table numbers.
 
-        updated_bitmask = self.encode_bitmask(updated_tables)
+        """
+        bitmask = 0
+        for bits in input:
+            bitmask |= 1 << (bits - 1)
+        return bitmask
 
-        db = get_db()
-        cursor = db.cursor()
-        cursor.execute("UPDATE users SET tables_assigned = ? WHERE user_id = ?", (updated_bitmask, user_id))
-        db.commit()
+    @staticmethod
+    def _check_tables(tables):
+        """
+        Converts table numbers to integers and checks they exist in the venue.
 
+            Parameters:
+                tables (iterable of int or str): The table numbers, possibly from a form.
 
+            Returns:
+                set of int: The table numbers.
 
+            Raises:
+                ValueError: If a table number is outside 1 to the 'TABLE_COUNT' config.
+        """
+        tables = {int(table) for table in tables}
+        count = table_count()
+        invalid = sorted(table for table in tables if not 1 <= table <= count)
+        if invalid:
+            raise ValueError(f"Tables must be between 1 and {count}: {invalid}")
+        return tables
+
+
+def table_count():
+    """
+    Retrieves the number of tables in the venue from the 'TABLE_COUNT' config.
+
+        Returns:
+            int: The configured number of tables, or DEFAULT_TABLE_COUNT if it is not set.
+    """
+    return current_app.config.get('TABLE_COUNT', DEFAULT_TABLE_COUNT)
+
+
+def user_cache_key(user_id):
+    """
+    Normalises a user ID, which may arrive as a string from a form, to the integer used as the cache key.
+
+        Parameters:
+            user_id (int or str): The user's ID.
+
+        Returns:
+            int or None: The user ID as an integer, or None if it is not a valid ID.
+    """
+    try:
+        return int(user_id)
+    except (TypeError, ValueError):
+        return None
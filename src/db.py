@@ -1,49 +1,199 @@
 import sqlite3
 import os
+import threading
+from collections import deque
 from flask import current_app, g
 import click
 
+from src.migrations import migrate, drop_all_tables, current_version, LATEST_VERSION
+from src.user_cache import user_cache
+
+# Pragmas applied to every new connection unless the 'SQLITE_PRAGMAS' config overrides them.
+# WAL lets readers carry on while a write is in progress, and NORMAL sync is safe in WAL mode.
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -16000,
+    'mmap_size': 134217728,
+}
+DEFAULT_POOL_SIZE = 8
+
+
+class ConnectionPool:
+    """
+    Keeps a small number of idle SQLite connections per database so that requests reuse
+    an already configured connection instead of opening a new one each time.
+
+    A connection is only ever used by one thread at a time: it is taken out of the pool
+    when an application context first needs it and returned when the context ends.
+
+        Attributes:
+            max_idle (int): The number of idle connections kept per database. Extra connections are closed.
+    """
+    def __init__(self, max_idle=DEFAULT_POOL_SIZE):
+        """
+        Setups an empty pool.
+
+            Parameters:
+                max_idle (int): The number of idle connections kept per database.
+        """
+        self.max_idle = max_idle
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._stats = {'created': 0, 'reused': 0, 'released': 0, 'discarded': 0, 'in_use': 0}
+
+    def acquire(self, database, pragmas):
+        """
+        Takes an idle connection for the database from the pool, or opens a new one.
+
+            Parameters:
+                database (str): The path of the database file.
+                pragmas (dict): The pragmas to apply to a newly opened connection.
+
+            Returns:
+                sqlite3.Connection: A connection that returns rows as sqlite3.Row.
+        """
+        key = (database, tuple(sorted(pragmas.items())))
+        with self._lock:
+            idle = self._idle.get(key)
+            db = idle.pop() if idle else None
+            self._stats['reused' if db is not None else 'created'] += 1
+            self._stats['in_use'] += 1
+        if db is None:
+            db = self._connect(database, pragmas)
+            db.pool_key = key
+        return db
+
+    def release(self, db):
+        """
+        Returns a connection to the pool, rolling back anything left uncommitted. The
+        connection is closed instead when the pool for its database is already full.
+
+            Parameters:
+                db (sqlite3.Connection): A connection previously returned by `acquire`.
+        """
+        if db.in_transaction:
+            db.rollback()
+        db.set_trace_callback(None)
+        db.row_factory = sqlite3.Row
+        with self._lock:
+            self._stats['in_use'] -= 1
+            idle = self._idle.setdefault(db.pool_key, deque())
+            keep = len(idle) < self.max_idle
+            if keep:
+                idle.append(db)
+                self._stats['released'] += 1
+            else:
+                self._stats['discarded'] += 1
+        if not keep:
+            db.close()
+
+    def stats(self):
+        """
+        Retrieves the pool counters.
+
+            Returns:
+                dict: Connections created, reused, released back to the pool, discarded because
+                the pool was full, currently in use and currently idle.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['idle'] = sum(len(idle) for idle in self._idle.values())
+        return stats
+
+    def clear(self):
+        """
+        Closes every idle connection.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for db in connections:
+                db.close()
+
+    @staticmethod
+    def _connect(database, pragmas):
+        """
+        Opens a connection and applies the pragmas once.
+
+            Parameters:
+                database (str): The path of the database file.
+                pragmas (dict): The pragmas to apply, e.g. {'journal_mode': 'WAL'}.
+
+            Returns:
+                sqlite3.Connection: The configured connection.
+        """
+        # Connections move between request threads, but the pool hands each one to a single thread at a time
+        db = PooledConnection(
+            database,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False
+        )
+        db.row_factory = sqlite3.Row
+        for name, value in pragmas.items():
+            db.execute(f"PRAGMA {name} = {value}").fetchall()
+        return db
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    A sqlite3 connection that remembers which pool slot it belongs to.
+    """
+    pool_key = None
+
+
+pool = ConnectionPool()
+
 
 def get_db():
     """
-    Creates a database connection using the database path from Flask's 'current_app' config.
+    Gets a database connection for the database path in Flask's 'current_app' config,
+    taking it from the connection pool the first time it is needed in an application context.
     Accesses SQlite query results by column name.
 
+    The pragmas come from the 'SQLITE_PRAGMAS' config, or DEFAULT_PRAGMAS when it is not set.
+
     Returns:
         A sqlite3 database connection object.
     """
     if 'db' not in g:
-        g.db = sqlite3.connect(
-            current_app.config['DATABASE'],
-            detect_types=sqlite3.PARSE_DECLTYPES
-        )
-        g.db.row_factory = sqlite3.Row
+        pragmas = current_app.config.get('SQLITE_PRAGMAS')
+        if pragmas is None:
+            pragmas = DEFAULT_PRAGMAS
+        pool.max_idle = current_app.config.get('SQLITE_POOL_SIZE', DEFAULT_POOL_SIZE)
+        g.db = pool.acquire(current_app.config['DATABASE'], pragmas)
 
     return g.db
 
 
+def get_pool_stats():
+    """
+    Retrieves the connection pool counters.
+
+    Returns:
+        dict: The counters described in ConnectionPool.stats.
+    """
+    return pool.stats()
+
+
 def init_db(db_name='database.db'):
     """
-    Initializes the database by creating tables according to the schema files from
-    'database' directory relative to its location.
+    Initializes the database by dropping any existing tables and then running every
+    migration from 'migrations.py' to build the current schema.
 
     Parameters:
         db_name (str): The name of the database file. Default is 'database.db'
     """
     db = get_db()
-    sql_dir = os.path.join(os.path.dirname(__file__), 'database')
-    sql_files = ['users.sql', 'Orders.sql', 'Order Items.sql', 'Menu Items.sql']
-
-    for file_name in sql_files:
-        file_path = os.path.join(sql_dir, file_name)
-        with open(file_path, 'r') as f:
-            db.executescript(f.read())
-
+    drop_all_tables(db)
+    migrate(db)
+    user_cache.clear()
 
 
 def close_db(e=None):
     """
-    Closes database connection.
+    Returns the database connection to the connection pool.
 
     Parameters:
         e (Exception, optional): An error instance, default to None.
@@ -51,7 +201,7 @@ def close_db(e=None):
     db = g.pop('db', None)
 
     if db is not None:
-        db.close()
+        pool.release(db)
 
 @click.command('init-db')
 def init_db_command():
@@ -61,6 +211,17 @@ def init_db_command():
     init_db()
     click.echo('Initialized the database.')
 
+@click.command('migrate')
+def migrate_command():
+    """
+    Command to bring the database schema up to date without touching existing data.
+    """
+    db = get_db()
+    applied = migrate(db)
+    if applied:
+        click.echo(f'Applied migrations {", ".join(map(str, applied))}.')
+    click.echo(f'Database is at schema version {current_version(db)} (latest {LATEST_VERSION}).')
+
 def init_app(app):
     """
     Registers database-related functions with the Flask application
@@ -70,4 +231,5 @@ def init_app(app):
     """
     app.teardown_appcontext(close_db)
     app.cli.add_command(init_db_command)
+    app.cli.add_command(migrate_command)
 
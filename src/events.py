@@ -0,0 +1,153 @@
+import json
+import threading
+from collections import deque
+
+
+class OrderEventBroker:
+    """
+    Fans order changes out to every connected kitchen and waiter screen.
+
+    Events are kept in a bounded in-memory buffer with increasing IDs. Each screen waits
+    on a shared condition and reads the events it has not seen yet, so a change costs one
+    publish however many screens are connected and no screen polls the database.
+
+        Attributes:
+            max_events (int): The number of recent events kept for screens that reconnect.
+            subscribers (int): The number of screens currently streaming.
+    """
+    def __init__(self, max_events=1000):
+        """
+        Setups an empty broker.
+
+            Parameters:
+                max_events (int): The number of recent events kept for screens that reconnect.
+        """
+        self.max_events = max_events
+        self.subscribers = 0
+        self._events = deque(maxlen=max_events)
+        self._last_id = 0
+        self._condition = threading.Condition()
+
+    @property
+    def last_id(self):
+        """
+        The ID of the most recently published event, or 0 if none has been published.
+        """
+        return self._last_id
+
+    def publish(self, event_type, data):
+        """
+        Records an event and wakes every waiting screen.
+
+            Parameters:
+                event_type (str): The event name, e.g. 'order_created'.
+                data (dict): The JSON-serialisable event payload.
+
+            Returns:
+                int: The ID given to the event.
+        """
+        payload = json.dumps(data, default=str)
+        with self._condition:
+            self._last_id += 1
+            self._events.append((self._last_id, event_type, payload))
+            self._condition.notify_all()
+            return self._last_id
+
+    def events_since(self, last_id):
+        """
+        Retrieves the buffered events published after an event ID.
+
+            Parameters:
+                last_id (int): The ID of the last event the caller has seen.
+
+            Returns:
+                list of tuple: (event_id, event_type, json_payload) in publish order.
+        """
+        with self._condition:
+            return [event for event in self._events if event[0] > last_id]
+
+    def wait(self, last_id, timeout):
+        """
+        Waits until there are events newer than last_id, or until the timeout passes.
+
+            Parameters:
+                last_id (int): The ID of the last event the caller has seen.
+                timeout (float): The longest time to wait in seconds.
+
+            Returns:
+                list of tuple: The new events, which is empty if the wait timed out.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._last_id > last_id, timeout)
+            return [event for event in self._events if event[0] > last_id]
+
+    def stream(self, last_id=None, keepalive=15.0):
+        """
+        Generates server-sent event messages for one screen, forever.
+
+            Parameters:
+                last_id (int, optional): The ID of the last event the screen saw before reconnecting.
+                                         Only new events are sent when omitted.
+                keepalive (float): Seconds between comment lines sent to keep idle connections open.
+
+            Yields:
+                str: Messages in the text/event-stream format.
+        """
+        if last_id is None:
+            last_id = self._last_id
+        with self._condition:
+            self.subscribers += 1
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                events = self.wait(last_id, keepalive)
+                if not events:
+                    yield ": keepalive\n\n"
+                for event_id, event_type, payload in events:
+                    last_id = event_id
+                    yield f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n"
+        finally:
+            with self._condition:
+                self.subscribers -= 1
+
+
+order_events = OrderEventBroker()
+
+
+def publish_order_created(order):
+    """
+    Publishes an 'order_created' event.
+
+        Parameters:
+            order (dict or sqlite3.Row): The new order's columns.
+    """
+    order_events.publish('order_created', {
+        "order_id": order['order_id'],
+        "order_date": order['order_date'],
+        "email": order['email'],
+        "table_number": order['table_number'],
+        "total": order['total'],
+        "user_id": order['user_id'],
+        "order_status": order['order_status']
+    })
+
+
+def publish_order_status_changed(order_id, order_status):
+    """
+    Publishes an 'order_status_changed' event.
+
+        Parameters:
+            order_id (int): The ID of the updated order.
+            order_status (str): The order's new status.
+    """
+    order_events.publish('order_status_changed', {"order_id": int(order_id), "order_status": order_status})
+
+
+def publish_order_deleted(order_id):
+    """
+    Publishes an 'order_deleted' event.
+
+        Parameters:
+            order_id (int): The ID of the deleted order.
+    """
+    order_events.publish('order_deleted', {"order_id": int(order_id)})
@@ -0,0 +1,96 @@
+import threading
+
+
+class MenuSnapshot:
+    """
+    An immutable view of the menu at one version, with lookup indexes built once.
+
+        Attributes:
+            version (int): The menu version the snapshot was built from.
+            items (list of sqlite3.Row): All menu items in table order.
+            by_id (dict): Menu items keyed by menu_item_id.
+            by_name (dict): Menu items keyed by menu_item_name.
+            by_category (dict): Lists of menu items keyed by menu_item_category.
+    """
+    def __init__(self, version, items):
+        """
+        Builds the lookup indexes for a list of menu rows.
+
+            Parameters:
+                version (int): The menu version the rows belong to.
+                items (list of sqlite3.Row): The menu rows.
+        """
+        self.version = version
+        self.items = items
+        self.by_id = {item['menu_item_id']: item for item in items}
+        self.by_name = {item['menu_item_name']: item for item in items}
+        self.by_category = {}
+        for item in items:
+            self.by_category.setdefault(item['menu_item_category'], []).append(item)
+
+
+class MenuCache:
+    """
+    An in-process cache of the menu that is invalidated by bumping a version number.
+
+    Readers get a MenuSnapshot built for the current version. Writers call `invalidate`
+    after changing menu_items, which bumps the version so the next read reloads the menu.
+
+        Attributes:
+            version (int): The current menu version.
+            hits (int): The number of reads served from the cache.
+            misses (int): The number of reads that had to load the menu from the database.
+    """
+    def __init__(self):
+        """
+        Setups an empty cache at version 0.
+        """
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def get(self, load):
+        """
+        Returns the snapshot for the current version, loading it if needed.
+
+            Parameters:
+                load (callable): Returns the list of menu rows from the database.
+
+            Returns:
+                MenuSnapshot: The menu at the current version.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self.version:
+            self.hits += 1
+            return snapshot
+
+        # Writers also take the lock, so a reload never overlaps an invalidation
+        with self._lock:
+            version = self.version
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version:
+                self.misses += 1
+                snapshot = MenuSnapshot(version, load())
+                self._snapshot = snapshot
+            else:
+                self.hits += 1
+        return snapshot
+
+    def invalidate(self):
+        """
+        Bumps the menu version so that the next read reloads the menu.
+        """
+        with self._lock:
+            self.version += 1
+            self._snapshot = None
+
+    def stats(self):
+        """
+        Returns the cache counters.
+
+            Returns:
+                dict: The current version and the hit and miss counts.
+        """
+        return {'version': self.version, 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,168 @@
+import os
+from datetime import datetime
+
+SQL_DIR = os.path.join(os.path.dirname(__file__), 'database')
+
+
+def _baseline_schema(db):
+    """
+    Creates the original tables from the schema files in the 'database' directory.
+
+        Parameters:
+            db (sqlite3.Connection): The connection to migrate.
+    """
+    for file_name in ['users.sql', 'Orders.sql', 'Order Items.sql', 'Menu Items.sql']:
+        with open(os.path.join(SQL_DIR, file_name), 'r') as f:
+            db.executescript(f.read())
+
+
+def _lookup_indexes(db):
+    """
+    Adds secondary indexes for the columns that orders, order items and waiter calls are looked up by.
+
+        Parameters:
+            db (sqlite3.Connection): The connection to migrate.
+    """
+    db.execute("CREATE INDEX IF NOT EXISTS idx_orders_table_number ON orders(table_number)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_orders_user_id ON orders(user_id)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items(order_id)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_users_needs_waiter ON users(needs_waiter)")
+
+
+def _order_status_index(db):
+    """
+    Adds an index for listing orders with a given status, newest first.
+
+        Parameters:
+            db (sqlite3.Connection): The connection to migrate.
+    """
+    db.execute("CREATE INDEX IF NOT EXISTS idx_orders_status_order_id ON orders(order_status, order_id)")
+
+
+def _waiter_call_queue(db):
+    """
+    Adds the waiter_calls queue and carries over customers who were flagged as needing a waiter.
+
+    The partial indexes only hold open calls, so listing them costs O(open calls) however
+    many calls have been acknowledged.
+
+        Parameters:
+            db (sqlite3.Connection): The connection to migrate.
+    """
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS waiter_calls ("
+        "call_id INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "table_number INTEGER, "
+        "user_id INTEGER REFERENCES users(user_id), "
+        "created_at TIMESTAMP NOT NULL, "
+        "acknowledged_at TIMESTAMP)"
+    )
+    db.execute("CREATE INDEX IF NOT EXISTS idx_waiter_calls_open ON waiter_calls(call_id) "
+               "WHERE acknowledged_at IS NULL")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_waiter_calls_user_open ON waiter_calls(user_id) "
+               "WHERE acknowledged_at IS NULL")
+    db.execute(
+        "INSERT INTO waiter_calls (table_number, user_id, created_at) "
+        "SELECT (SELECT table_number FROM orders WHERE orders.user_id = users.user_id "
+        "        ORDER BY order_id DESC LIMIT 1), user_id, ? "
+        "FROM users WHERE needs_waiter = 1 AND NOT EXISTS ("
+        "    SELECT 1 FROM waiter_calls WHERE waiter_calls.user_id = users.user_id AND acknowledged_at IS NULL)",
+        (datetime.now().strftime('%Y-%m-%d %H:%M:%S'),)
+    )
+
+
+def _waiter_table_assignments(db):
+    """
+    Adds the waiter_tables relation and copies every waiter's users.tables_assigned bitmask into it.
+
+    The primary key serves waiter to tables lookups and idx_waiter_tables_table serves table to
+    waiters lookups. The old column is left in place but is no longer read or written.
+
+        Parameters:
+            db (sqlite3.Connection): The connection to migrate.
+    """
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS waiter_tables ("
+        "user_id INTEGER NOT NULL REFERENCES users(user_id), "
+        "table_number INTEGER NOT NULL, "
+        "PRIMARY KEY (user_id, table_number)) WITHOUT ROWID"
+    )
+    db.execute("CREATE INDEX IF NOT EXISTS idx_waiter_tables_table ON waiter_tables(table_number, user_id)")
+
+    assignments = []
+    for user_id, bitmask in db.execute("SELECT user_id, tables_assigned FROM users WHERE tables_assigned > 0"):
+        assignments.extend((user_id, bit + 1) for bit in range(bitmask.bit_length()) if bitmask >> bit & 1)
+    db.executemany("INSERT OR IGNORE INTO waiter_tables (user_id, table_number) VALUES (?, ?)", assignments)
+
+
+# Ordered list of (version, name, step). Steps must be idempotent so that a migration
+# interrupted before its version was recorded can safely run again.
+MIGRATIONS = [
+    (1, 'baseline schema', _baseline_schema),
+    (2, 'lookup indexes', _lookup_indexes),
+    (3, 'order status index', _order_status_index),
+    (4, 'waiter call queue', _waiter_call_queue),
+    (5, 'waiter table assignments', _waiter_table_assignments),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(db):
+    """
+    Retrieves the schema version of a database.
+
+        Parameters:
+            db (sqlite3.Connection): The connection to inspect.
+
+        Returns:
+            int: The highest applied migration version, or 0 for a database that has never been migrated.
+    """
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at TIMESTAMP NOT NULL)"
+    )
+    row = db.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def migrate(db):
+    """
+    Applies every migration newer than the database's schema version, in order.
+
+    Each step and the row recording its version are committed together, so the
+    schema_version table always reflects the steps that have completed.
+
+        Parameters:
+            db (sqlite3.Connection): The connection to migrate.
+
+        Returns:
+            list of int: The versions that were applied. Empty when the schema is already current.
+    """
+    version = current_version(db)
+    db.commit()
+    applied = []
+    for step_version, name, step in MIGRATIONS:
+        if step_version <= version:
+            continue
+        with db:
+            step(db)
+            db.execute("INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                       (step_version, name, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+        applied.append(step_version)
+    return applied
+
+
+def drop_all_tables(db):
+    """
+    Drops every table in the database, including the schema_version table.
+
+        Parameters:
+            db (sqlite3.Connection): The connection whose tables are dropped.
+    """
+    tables = db.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+    ).fetchall()
+    for (table_name,) in tables:
+        db.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+    db.commit()
@@ -0,0 +1,196 @@
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from flask import current_app
+
+DEFAULT_LOG_ROUNDS = 12
+
+# bcrypt only uses the first 72 bytes of a password and newer releases refuse longer input
+MAX_PASSWORD_BYTES = 72
+
+_COST_PATTERN = re.compile(r'^\$2[abxy]?\$(\d{2})\$')
+
+
+class HasherBusy(Exception):
+    """
+    Raised when too many password hashes are already running or waiting, so the request
+    can be turned away straight away instead of queueing behind them.
+    """
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small pool of worker threads with a cap on how many hashes may be
+    running or waiting at once.
+
+    bcrypt releases the GIL while it works, so the pool spreads hashing over the available
+    cores while request threads only wait on the result. The pool is created on first use
+    from the 'PASSWORD_HASH_WORKERS' and 'PASSWORD_HASH_MAX_PENDING' config values.
+
+        Attributes:
+            max_workers (int): The number of hashing threads.
+            max_pending (int): The number of hashes that may be running or waiting at once.
+    """
+    def __init__(self):
+        """
+        Setups the hasher. The worker pool is created on first use.
+        """
+        self.max_workers = None
+        self.max_pending = None
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def configure(self, max_workers, max_pending):
+        """
+        Replaces the worker pool with one of the given size.
+
+            Parameters:
+                max_workers (int): The number of hashing threads.
+                max_pending (int): The number of hashes that may be running or waiting at once.
+        """
+        with self._lock:
+            old_executor = self._executor
+            self._create_pool(max_workers, max_pending)
+        if old_executor is not None:
+            old_executor.shutdown(wait=False)
+
+    def hash(self, password, rounds=None):
+        """
+        Hashes a password on the worker pool.
+
+            Parameters:
+                password (str): The plain text password.
+                rounds (int, optional): The bcrypt cost factor. Defaults to the 'BCRYPT_LOG_ROUNDS' config.
+
+            Returns:
+                str: The bcrypt hash.
+
+            Raises:
+                HasherBusy: If the pool already has as many hashes as it allows.
+        """
+        if rounds is None:
+            rounds = configured_rounds()
+        hashed = self._run(bcrypt.hashpw, _encode(password), bcrypt.gensalt(rounds))
+        return hashed.decode('utf-8')
+
+    def check(self, hashed, password):
+        """
+        Checks a password against a bcrypt hash on the worker pool.
+
+            Parameters:
+                hashed (str): The stored bcrypt hash.
+                password (str): The plain text password to check.
+
+            Returns:
+                bool: True if the password matches.
+
+            Raises:
+                HasherBusy: If the pool already has as many hashes as it allows.
+        """
+        try:
+            return self._run(bcrypt.checkpw, _encode(password), hashed.encode('utf-8'))
+        except ValueError:
+            # The stored value is not a valid bcrypt hash
+            return False
+
+    def stats(self):
+        """
+        Retrieves the pool settings.
+
+            Returns:
+                dict: The number of workers and the cap on running or waiting hashes.
+        """
+        return {'max_workers': self.max_workers, 'max_pending': self.max_pending}
+
+    def _run(self, function, *args):
+        """
+        Runs a bcrypt call on the pool and waits for its result.
+
+            Parameters:
+                function (callable): bcrypt.hashpw or bcrypt.checkpw.
+                *args: The arguments for the call.
+
+            Returns:
+                The result of the call.
+        """
+        if self._executor is None:
+            workers = current_app.config.get('PASSWORD_HASH_WORKERS') or os.cpu_count() or 1
+            pending = current_app.config.get('PASSWORD_HASH_MAX_PENDING') or workers * 4
+            with self._lock:
+                if self._executor is None:
+                    self._create_pool(workers, pending)
+
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            future = self._executor.submit(function, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future.result()
+
+    def _create_pool(self, max_workers, max_pending):
+        """
+        Creates the worker pool and the semaphore that caps pending hashes. Callers hold the lock.
+
+            Parameters:
+                max_workers (int): The number of hashing threads.
+                max_pending (int): The number of hashes that may be running or waiting at once.
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+
+def configured_rounds():
+    """
+    Retrieves the bcrypt cost factor from the 'BCRYPT_LOG_ROUNDS' config.
+
+        Returns:
+            int: The configured cost factor, or DEFAULT_LOG_ROUNDS if it is not set.
+    """
+    return current_app.config.get('BCRYPT_LOG_ROUNDS', DEFAULT_LOG_ROUNDS)
+
+
+def hash_rounds(hashed):
+    """
+    Reads the cost factor a bcrypt hash was made with.
+
+        Parameters:
+            hashed (str): A bcrypt hash such as '$2b$12$...'.
+
+        Returns:
+            int or None: The cost factor, or None if the value is not a bcrypt hash.
+    """
+    match = _COST_PATTERN.match(hashed or '')
+    return int(match.group(1)) if match else None
+
+
+def needs_rehash(hashed, rounds=None):
+    """
+    Checks whether a stored hash was made with a different cost factor than the configured one.
+
+        Parameters:
+            hashed (str): The stored bcrypt hash.
+            rounds (int, optional): The wanted cost factor. Defaults to the 'BCRYPT_LOG_ROUNDS' config.
+
+        Returns:
+            bool: True if the password should be hashed again.
+    """
+    if rounds is None:
+        rounds = configured_rounds()
+    return hash_rounds(hashed) != rounds
+
+
+def _encode(password):
+    return password.encode('utf-8')[:MAX_PASSWORD_BYTES]
+
+
+password_hasher = PasswordHasher()
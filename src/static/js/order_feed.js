@@ -0,0 +1,23 @@
+// Subscribes to the live order feed at /stream/orders and calls the matching handler
+// with the parsed event data. Handlers are keyed by event name: order_created,
+// order_status_changed and order_deleted. The browser reconnects on its own and
+// resumes from the last event it received.
+function subscribeToOrders(handlers) {
+    if (!window.EventSource) {
+        return null;
+    }
+    var source = new EventSource('/stream/orders');
+    ['order_created', 'order_status_changed', 'order_deleted'].forEach(function (type) {
+        source.addEventListener(type, function (event) {
+            if (handlers[type]) {
+                handlers[type](JSON.parse(event.data));
+            }
+        });
+    });
+    return source;
+}
+
+// Formats a price the same way as the server-rendered tables.
+function formatPrice(total) {
+    return '£' + Number(total).toFixed(2);
+}
@@ -85,6 +85,45 @@ def test_create_order(db_manager, app):
         assert order[5] == 1  # user id
 
 
+def test_place_order(db_manager, app, setup_user_data):
+    with app.app_context():
+        header = {'order_date': "2024-01-01 00:00:00", 'email': "johndan@email.com", 'table_number': 3,
+                  'total': 34.97, 'user_id': 1}
+        order_id = db_manager.place_order(header, [(1, 1), (2, 1), (3, 1)])
+
+        order = db_manager.get_order(order_id)
+        assert order['table_number'] == 3
+        assert order['order_status'] == 'Order confirmed!'
+        items = db_manager.get_order_items(order_id)
+        assert [item['menu_item_name'] for item in items] == ["Dish1", "Dish2", "Dish3"]
+
+
+def test_place_order_commits_once(db_manager, app, setup_user_data):
+    with app.app_context():
+        db = get_db()
+        statements = []
+        db.set_trace_callback(statements.append)
+        header = {'order_date': "2024-01-01 00:00:00", 'email': "johndan@email.com", 'table_number': 1,
+                  'total': 10.99, 'user_id': 1}
+        db_manager.place_order(header, [(1, 1), (2, 2), (3, 3)])
+        db.set_trace_callback(None)
+
+        assert statements.count('COMMIT') == 1
+
+
+def test_place_order_is_atomic(db_manager, app, setup_user_data):
+    with app.app_context():
+        header = {'order_date': "2024-01-01 00:00:00", 'email': "johndan@email.com", 'table_number': 1,
+                  'total': 10.99, 'user_id': 1}
+        # A line item without a quantity violates NOT NULL, so nothing should be written.
+        with pytest.raises(sqlite3.IntegrityError):
+            db_manager.place_order(header, [(1, 1), (2, None)])
+
+        db = get_db()
+        assert db.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == 0
+        assert db.execute("SELECT COUNT(*) FROM order_items").fetchone()[0] == 0
+
+
 def test_create_menu_item(db_manager, app):
     with app.app_context():
         menu_item_data = ("Dish1", "Description1", 10.99, "Ingredient1", 200, "static/images/testFood.jpg", "category1")
@@ -130,6 +169,26 @@ def test_get_all_menu_items(db_manager, app):
             assert menu_item[7] == menu_items_data[i][6]
 
 
+def test_menu_cache_hits_and_invalidation(db_manager, app, setup_user_data):
+    with app.app_context():
+        version = db_manager.menu_version
+        db_manager.get_all_menu_items()
+        db_manager.get_all_menu_items()
+        stats = db_manager.get_menu_cache_stats()
+        assert stats['misses'] == 1
+        assert stats['hits'] == 1
+
+        db_manager.update_menu_item(1, "Dish1 Updated", "Description1", 9.99, "Ingredient1", 200,
+                                    "static/images/testFood.jpg", "category1")
+        assert db_manager.menu_version == version + 1
+
+        menu = db_manager.get_menu()
+        assert db_manager.get_menu_cache_stats()['misses'] == 2
+        assert menu.by_id[1]['menu_item_name'] == "Dish1 Updated"
+        assert menu.by_name["Dish1 Updated"]['menu_item_price'] == 9.99
+        assert [item['menu_item_name'] for item in menu.by_category["category2"]] == ["Dish2"]
+
+
 def test_get_menu_item_by_id(db_manager, app):
     with app.app_context():
         db = get_db()
@@ -171,6 +230,30 @@ def test_get_all_orders(db_manager, app):
             assert order['user_id'] in [od[4] for od in orders_data]
 
 
+def test_get_orders_page(db_manager, app):
+    with app.app_context():
+        for table_number in range(1, 8):
+            db_manager.create_order("2024-01-01 00:00:00", "johndoe@email.com", table_number, 20.0, 1)
+        db_manager.update_order(2, 'The order is in the kitchen!')
+        db_manager.update_order(5, 'The order is in the kitchen!')
+
+        # Walks all pages, newest order first
+        seen = []
+        after_id = None
+        while True:
+            orders, after_id = db_manager.get_orders_page(after_id, 3)
+            seen.extend(order['order_id'] for order in orders)
+            if after_id is None:
+                break
+        assert seen == [7, 6, 5, 4, 3, 2, 1]
+
+        orders, after_id = db_manager.get_orders_page(None, 1, 'The order is in the kitchen!')
+        assert [order['order_id'] for order in orders] == [5]
+        orders, after_id = db_manager.get_orders_page(after_id, 1, 'The order is in the kitchen!')
+        assert [order['order_id'] for order in orders] == [2]
+        assert after_id is None
+
+
 def test_delete_order(db_manager, app):
     # Create an order in the database.
     with app.app_context():
@@ -309,8 +392,35 @@ def test_change_needs_waiter(db_manager, app, setup_user_data):
         updated_needs_waiter = cursor.fetchone()["needs_waiter"]
         assert updated_needs_waiter == True, "User's needs_waiter has not been updated!"
 
+def test_waiter_call_queue(db_manager, app, setup_user_data):
+    with app.app_context():
+        db_manager.place_order({'order_date': "2024-01-01 00:00:00", 'email': "johndan@email.com",
+                                'table_number': 7, 'total': 10.99, 'user_id': 1}, [(1, 1)])
+        first_call = db_manager.call_waiter(1)
+        # Calling again while waiting does not queue a second call
+        assert db_manager.call_waiter(1) == first_call
+        second_call = db_manager.call_waiter(2, table_number=3)
 
+        calls = db_manager.get_customers_need_waiter()
+        assert [(call["call_id"], call["name"], call["table_number"]) for call in calls] == \
+            [(first_call, "John Dan", 7), (second_call, "Harry Potter", 3)]
 
+        assert db_manager.acknowledge_waiter_calls([first_call, second_call]) == 2
+        assert db_manager.acknowledge_waiter_calls([first_call]) == 0
+        assert db_manager.get_open_waiter_calls() == []
 
+        needs_waiter = get_db().execute("SELECT needs_waiter FROM users ORDER BY user_id").fetchall()
+        assert [row["needs_waiter"] for row in needs_waiter] == [0, 0]
 
 
+def test_replace_waiter_tables(db_manager, app, setup_user_data):
+    with app.app_context():
+        db_manager.add_waiter_tables(2, {1, 2, 3})
+        db_manager.replace_waiter_tables(2, {3, 4})
+        assert db_manager.get_assigned_tables(2) == [3, 4]
+        assert db_manager.get_table_waiters(4) == [2]
+
+        # A rejected set leaves the current assignments untouched
+        with pytest.raises(ValueError):
+            db_manager.replace_waiter_tables(2, {5, 21})
+        assert db_manager.get_assigned_tables(2) == [3, 4]
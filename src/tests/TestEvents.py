@@ -0,0 +1,71 @@
+import json
+import threading
+import pytest
+from flask import Flask
+from src.database_manager import DatabaseManager
+from src.db import init_db
+from src.events import OrderEventBroker, order_events
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config['DATABASE'] = 'database.db'
+    return app
+
+
+@pytest.fixture
+def db_manager(app):
+    with app.app_context():
+        init_db("database.db")
+        manager = DatabaseManager("database.db")
+    return manager
+
+
+def test_events_since_returns_only_newer_events():
+    broker = OrderEventBroker()
+    first = broker.publish('order_created', {"order_id": 1})
+    broker.publish('order_deleted', {"order_id": 1})
+
+    events = broker.events_since(first)
+    assert [(event_type, json.loads(payload)) for _, event_type, payload in events] == \
+        [('order_deleted', {"order_id": 1})]
+
+
+def test_wait_wakes_on_publish():
+    broker = OrderEventBroker()
+    timer = threading.Timer(0.05, broker.publish, args=('order_deleted', {"order_id": 7}))
+    timer.start()
+    events = broker.wait(0, timeout=5)
+    timer.join()
+    assert [event_type for _, event_type, _ in events] == ['order_deleted']
+
+
+def test_stream_resumes_after_last_event_id():
+    broker = OrderEventBroker()
+    broker.publish('order_created', {"order_id": 1})
+    second = broker.publish('order_status_changed', {"order_id": 1, "order_status": "Order confirmed!"})
+
+    stream = broker.stream(last_id=second - 1)
+    assert next(stream) == "retry: 3000\n\n"
+    message = next(stream)
+    assert message.startswith(f"id: {second}\nevent: order_status_changed\n")
+    assert broker.subscribers == 1
+    stream.close()
+    assert broker.subscribers == 0
+
+
+def test_database_manager_publishes_order_events(db_manager, app):
+    with app.app_context():
+        last_id = order_events.last_id
+        order_id = db_manager.place_order({'order_date': "2024-01-01 00:00:00", 'email': "johndan@email.com",
+                                           'table_number': 4, 'total': 0, 'user_id': 1}, [])
+        db_manager.update_order(order_id, 'The order is in the kitchen!')
+        db_manager.delete_order(order_id)
+
+        events = [(event_type, json.loads(payload)) for _, event_type, payload in order_events.events_since(last_id)]
+        assert [event_type for event_type, _ in events] == ['order_created', 'order_status_changed', 'order_deleted']
+        assert events[0][1]['table_number'] == 4
+        assert events[1][1] == {"order_id": order_id, "order_status": 'The order is in the kitchen!'}
+        assert events[2][1] == {"order_id": order_id}
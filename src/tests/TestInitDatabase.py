@@ -1,4 +1,5 @@
-from src.db import init_db
+from flask import Flask
+from src.db import init_db, init_app, get_db, get_pool_stats
 import pytest
 import sqlite3
 import os
@@ -25,3 +26,37 @@ def test_tables_exist(db_connection):
     assert check_table_exists(db_connection, "order_items"), "The Table order_items does not exist"
     assert check_table_exists(db_connection, "menu_items"), "The Table menu_items does not exist"
 
+
+
+def test_pool_reuses_configured_connection(tmp_path):
+    app = Flask(__name__)
+    app.config['DATABASE'] = str(tmp_path / "pool.db")
+    init_app(app)
+
+    with app.app_context():
+        first = get_db()
+        assert first.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert first.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert first.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+    before = get_pool_stats()
+    with app.app_context():
+        assert get_db() is first
+    after = get_pool_stats()
+    assert after['reused'] == before['reused'] + 1
+    assert after['created'] == before['created']
+
+
+def test_pool_rolls_back_uncommitted_work(tmp_path):
+    app = Flask(__name__)
+    app.config['DATABASE'] = str(tmp_path / "pool.db")
+    app.config['SQLITE_PRAGMAS'] = {'journal_mode': 'DELETE'}
+    init_app(app)
+
+    with app.app_context():
+        get_db().execute("CREATE TABLE t (a INTEGER)")
+        get_db().commit()
+        get_db().execute("INSERT INTO t VALUES (1)")
+    with app.app_context():
+        db = get_db()
+        assert db.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+        assert db.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
@@ -0,0 +1,119 @@
+import pytest
+from flask import Flask
+from src.database_manager import DatabaseManager
+from src.db import init_db, get_db
+from src.migrations import migrate, current_version, LATEST_VERSION
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config['DATABASE'] = 'database.db'
+    return app
+
+
+@pytest.fixture
+def db_manager(app):
+    with app.app_context():
+        init_db("database.db")
+        manager = DatabaseManager("database.db")
+        manager.create_user("John Dan", "johndan", "password123", 1, "johndan@email.com")
+        manager.create_menu_item("Dish1", "Description1", 10.99, "Ingredient1", 200, None, "category1")
+        manager.place_order({'order_date': "2024-01-01 00:00:00", 'email': "johndan@email.com",
+                             'table_number': 1, 'total': 10.99, 'user_id': 1}, [(1, 1)])
+    return manager
+
+
+def test_migrate_records_version(db_manager, app):
+    with app.app_context():
+        db = get_db()
+        assert current_version(db) == LATEST_VERSION
+        versions = [row[0] for row in db.execute("SELECT version FROM schema_version ORDER BY version")]
+        assert versions == list(range(1, LATEST_VERSION + 1))
+
+
+def test_migrate_is_idempotent(db_manager, app):
+    with app.app_context():
+        db = get_db()
+        assert migrate(db) == []
+        # Running migrations again must not touch existing data
+        assert db.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == 1
+
+
+def test_migrate_upgrades_old_database(db_manager, app):
+    with app.app_context():
+        db = get_db()
+        db.execute("DROP INDEX idx_orders_user_id")
+        db.execute("DELETE FROM schema_version WHERE version > 1")
+        db.commit()
+
+        assert migrate(db) == list(range(2, LATEST_VERSION + 1))
+        index = db.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name = 'idx_orders_user_id'")
+        assert index.fetchone() is not None
+        assert db.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == 1
+
+
+def test_migrate_moves_waiter_bitmasks(db_manager, app):
+    with app.app_context():
+        db = get_db()
+        db.execute("DROP TABLE waiter_tables")
+        db.execute("DELETE FROM schema_version WHERE version >= 5")
+        db.execute("UPDATE users SET tables_assigned = ? WHERE user_id = 1", ((1 << 0) | (1 << 2) | (1 << 99),))
+        db.commit()
+
+        migrate(db)
+        assert db_manager.get_assigned_tables(1) == [1, 3, 100]
+        assert db_manager.get_table_waiters(100) == [1]
+
+
+# Methods that return a whole table by design, so a scan is the expected plan.
+FULL_LISTINGS = {'get_all_orders', 'get_all_users', 'get_all_menu_items', 'get_menu'}
+
+QUERY_CALLS = [
+    ('get_order_items', (1,)),
+    ('get_user_orders', (1,)),
+    ('get_order', (1,)),
+    ('get_role_id', (1,)),
+    ('get_orders_by_table', (1,)),
+    ('get_orders_page', (10, 50)),
+    ('get_orders_page', (10, 50, 'Order confirmed!')),
+    ('get_waiter_tables', (1,)),
+    ('get_assigned_tables', (1,)),
+    ('get_table_waiters', (1,)),
+    ('replace_waiter_tables', (1, {1, 2})),
+    ('remove_waiter_tables', (1, {1})),
+    ('update_order', (1, 'The order is in the kitchen!')),
+    ('update_user_role', (1, 1)),
+    ('change_needs_waiter', (1,)),
+    ('call_waiter', (1,)),
+    ('acknowledge_waiter_calls', ([1, 2],)),
+    ('get_open_waiter_calls', ()),
+    ('get_customers_need_waiter', ()),
+    ('update_menu_item', (1, "Dish1", "Description1", 10.99, "Ingredient1", 200, None, "category1")),
+    ('delete_order', (1,)),
+    ('delete_user', (1,)),
+]
+
+
+@pytest.mark.parametrize('method_name, args', QUERY_CALLS)
+def test_queries_use_indexes(db_manager, app, method_name, args):
+    assert method_name not in FULL_LISTINGS
+    with app.app_context():
+        db = get_db()
+        statements = []
+        db.set_trace_callback(statements.append)
+        getattr(db_manager, method_name)(*args)
+        db.set_trace_callback(None)
+
+        # Scanning a partial index only reads the rows it holds, such as the open waiter calls
+        partial_indexes = {row[0] for row in db.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND sql LIKE '% WHERE %'")}
+
+        queries = [s for s in statements if s.split(None, 1)[0].upper() in ('SELECT', 'UPDATE', 'DELETE')]
+        assert queries, f"{method_name} ran no queries"
+        for query in queries:
+            plan = [row[3] for row in db.execute("EXPLAIN QUERY PLAN " + query)]
+            scans = [step for step in plan if step.startswith('SCAN')
+                     and not any(step.endswith(f"USING INDEX {name}") for name in partial_indexes)]
+            assert not scans, f"{method_name} scans for {query!r}: {plan}"
@@ -0,0 +1,55 @@
+import threading
+import pytest
+from flask import Flask
+from src.passwords import PasswordHasher, HasherBusy, hash_rounds, needs_rehash
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config['BCRYPT_LOG_ROUNDS'] = 4
+    return app
+
+
+def test_hash_and_check(app):
+    hasher = PasswordHasher()
+    with app.app_context():
+        hashed = hasher.hash("Password123!")
+        assert hash_rounds(hashed) == 4
+        assert hasher.check(hashed, "Password123!")
+        assert not hasher.check(hashed, "password123!")
+        assert not hasher.check("not-a-hash", "Password123!")
+
+
+def test_needs_rehash_when_cost_changes(app):
+    hasher = PasswordHasher()
+    with app.app_context():
+        hashed = hasher.hash("Password123!")
+        assert not needs_rehash(hashed)
+        app.config['BCRYPT_LOG_ROUNDS'] = 5
+        assert needs_rehash(hashed)
+
+
+def test_busy_when_pending_limit_reached(app):
+    hasher = PasswordHasher()
+    hasher.configure(1, 1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_hash():
+        started.set()
+        release.wait(5)
+        return b"done"
+
+    worker = threading.Thread(target=hasher._run, args=(slow_hash,))
+    worker.start()
+    started.wait(5)
+    with app.app_context():
+        with pytest.raises(HasherBusy):
+            hasher.hash("Password123!")
+    release.set()
+    worker.join()
+
+    with app.app_context():
+        assert hasher.check(hasher.hash("Password123!"), "Password123!")
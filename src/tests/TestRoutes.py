@@ -0,0 +1,164 @@
+import pytest
+from src.app import app as flask_app, db_manager
+from src.db import init_db, get_db
+from src.passwords import password_hasher, hash_rounds
+
+
+@pytest.fixture
+def app():
+    flask_app.config['TESTING'] = True
+    flask_app.config['DATABASE'] = 'database.db'
+    with flask_app.app_context():
+        init_db("database.db")
+        db_manager.menu_cache.invalidate()
+        db_manager.create_menu_item("Dish1", "Description1", 10.99, "Ingredient1", 200, None, "main")
+        db_manager.create_menu_item("Dish2", "Description2", 11.99, "Ingredient2", 300, None, "main")
+    return flask_app
+
+
+@pytest.fixture
+def waiter_client(app):
+    with app.app_context():
+        db_manager.create_user("Harry Potter", "harrypotter", "password321", 2, "hp@email.com")
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = 1
+    return client
+
+
+def traced_get(client, url):
+    """
+    Requests a page inside an outer application context and returns the SELECT statements it ran.
+    """
+    statements = []
+    with flask_app.app_context():
+        db = get_db()
+        db.set_trace_callback(statements.append)
+        response = client.get(url)
+        db.set_trace_callback(None)
+    assert response.status_code == 200
+    return [s for s in statements if s.split(None, 1)[0].upper() == 'SELECT']
+
+
+def count_queries(client, url):
+    """
+    Requests a page inside an outer application context and counts the SELECT statements it ran.
+    """
+    return len(traced_get(client, url))
+
+
+def place_orders(table_numbers, orders_per_table):
+    with flask_app.app_context():
+        for table_number in table_numbers:
+            for _ in range(orders_per_table):
+                db_manager.place_order({'order_date': "2024-01-01 00:00:00", 'email': "customer@email.com",
+                                        'table_number': table_number, 'total': 22.98, 'user_id': 2},
+                                       [(1, 1), (2, 1)])
+
+
+def test_view_tables_query_count_is_constant(app, waiter_client):
+    with app.app_context():
+        db_manager.add_waiter_tables(1, {1})
+    place_orders([1], 1)
+    # Warms the user cache so both measured requests see the same cache state
+    waiter_client.get('/view-tables')
+    baseline = count_queries(waiter_client, '/view-tables')
+
+    with app.app_context():
+        db_manager.add_waiter_tables(1, {2, 3, 4, 5})
+    place_orders([1, 2, 3, 4, 5], 4)
+    assert count_queries(waiter_client, '/view-tables') == baseline
+
+
+def test_view_tables_shows_order_items(app, waiter_client):
+    with app.app_context():
+        db_manager.add_waiter_tables(1, {3, 4})
+    place_orders([3], 1)
+
+    response = waiter_client.get('/view-tables')
+    assert b'Table 3' in response.data
+    assert b'1 x Dish2' in response.data
+    assert b'No orders for this table.' in response.data
+
+
+def test_user_is_loaded_once_per_request(app, waiter_client):
+    app.config['USER_CACHE_TTL'] = 0
+    try:
+        user_queries = [q for q in traced_get(waiter_client, '/view-tables') if 'FROM users' in q]
+        assert len(user_queries) == 1  # the request's user row; tables come from waiter_tables
+    finally:
+        app.config['USER_CACHE_TTL'] = 5
+
+
+def test_user_cache_serves_repeat_requests(app, waiter_client):
+    waiter_client.get('/view-tables')
+    user_queries = [q for q in traced_get(waiter_client, '/view-tables') if 'SELECT * FROM users' in q]
+    assert user_queries == []
+
+
+def test_role_change_invalidates_user_cache(app, waiter_client):
+    assert waiter_client.get('/view-tables').status_code == 200
+    with app.app_context():
+        db_manager.update_user_role(1, 1)
+    response = waiter_client.get('/view-tables')
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/')
+
+
+def test_manager_only_page_returns_404_for_other_roles(app, waiter_client):
+    assert waiter_client.get('/manage-users').status_code == 404
+
+
+def test_login_rehashes_when_cost_changes(app):
+    app.config['BCRYPT_LOG_ROUNDS'] = 4
+    with app.app_context():
+        db_manager.create_user("John Dan", "johndan", password_hasher.hash("Password123!"), 1, "johndan@email.com")
+    app.config['BCRYPT_LOG_ROUNDS'] = 5
+    try:
+        response = app.test_client().post('/auth/login', data={'username': 'johndan', 'password': 'Password123!'})
+        assert response.status_code == 302
+        with app.app_context():
+            assert hash_rounds(db_manager.get_user(1)['password']) == 5
+    finally:
+        app.config['BCRYPT_LOG_ROUNDS'] = 12
+
+
+def test_login_returns_503_when_hashing_pool_is_full(app):
+    app.config['BCRYPT_LOG_ROUNDS'] = 4
+    with app.app_context():
+        db_manager.create_user("John Dan", "johndan", password_hasher.hash("Password123!"), 1, "johndan@email.com")
+    password_hasher.configure(1, 0)
+    try:
+        response = app.test_client().post('/auth/login', data={'username': 'johndan', 'password': 'Password123!'})
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+    finally:
+        password_hasher.configure(1, 4)
+        app.config['BCRYPT_LOG_ROUNDS'] = 12
+
+
+def test_waiter_sent_acknowledges_selected_calls(app, waiter_client):
+    with app.app_context():
+        db_manager.create_user("John Dan", "johndan", "password123", 1, "johndan@email.com")
+        db_manager.create_user("Ron Weasley", "ronweasley", "password123", 1, "ron@email.com")
+        first_call = db_manager.call_waiter(2, table_number=1)
+        db_manager.call_waiter(3, table_number=2)
+
+    response = waiter_client.post('/calling-waiter-list/edit-table', json={'call_ids': [first_call]})
+    assert response.get_json() == {"acknowledged": 1}
+    with app.app_context():
+        assert [call['user_id'] for call in db_manager.get_open_waiter_calls()] == [3]
+
+
+def test_edit_waiter_tables_replaces_assignments(app, waiter_client):
+    app.config['TABLE_COUNT'] = 120
+    try:
+        with app.app_context():
+            db_manager.add_waiter_tables(1, {1, 2})
+        response = waiter_client.post('/edit-waiter-tables', data={'tables': ['2', '120']})
+        assert response.status_code == 302
+        assert waiter_client.post('/edit-waiter-tables', data={'tables': ['121']}).status_code == 400
+        with app.app_context():
+            assert db_manager.get_assigned_tables(1) == [2, 120]
+    finally:
+        app.config['TABLE_COUNT'] = 20
@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class UserCache:
+    """
+    A small least-recently-used cache of user rows whose entries expire after a few seconds.
+
+    It saves the users query that runs before every request. Entries must be invalidated
+    whenever the user row changes; the time-to-live bounds how stale an entry can be when
+    the row is changed by another process.
+
+        Attributes:
+            max_size (int): The maximum number of users kept.
+            hits (int): The number of lookups served from the cache.
+            misses (int): The number of lookups that were not in the cache or had expired.
+    """
+    def __init__(self, max_size=1024):
+        """
+        Setups an empty cache.
+
+            Parameters:
+                max_size (int): The maximum number of users kept.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, ttl):
+        """
+        Retrieves a cached user row if it is younger than the time-to-live.
+
+            Parameters:
+                user_id (int): The ID of the user.
+                ttl (float): The maximum age of an entry in seconds.
+
+            Returns:
+                sqlite3.Row or None: The cached row, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and time.monotonic() - entry[0] < ttl:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+    def put(self, user_id, user):
+        """
+        Stores a user row, evicting the least recently used entry when the cache is full.
+
+            Parameters:
+                user_id (int): The ID of the user.
+                user (sqlite3.Row): The user row.
+        """
+        with self._lock:
+            self._entries[user_id] = (time.monotonic(), user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        """
+        Removes a user from the cache.
+
+            Parameters:
+                user_id (int): The ID of the user whose row changed.
+        """
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        """
+        Removes every user from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Returns the cache counters.
+
+            Returns:
+                dict: The number of cached users and the hit and miss counts.
+        """
+        with self._lock:
+            return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+user_cache = UserCache()